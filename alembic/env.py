@@ -1,9 +1,7 @@
 from __future__ import with_statement
 
-import os
-
 from alembic import context
-from sqlalchemy import engine_from_config, pool
+from sqlalchemy import engine_from_config, pool, text
 from logging.config import fileConfig
 
 # this is the Alembic Config object, which provides
@@ -22,16 +20,17 @@ fileConfig(config.config_file_name)
 
 from src.utility.database.alembic_base import Base  # noqa
 from src.utility.database.models import *  # noqa
+from src.utility.settings import settings  # noqa
 
 target_metadata = Base.metadata
 
+# Held while migrating, so that when several replicas start at once, one migrates and the rest wait and then find the
+# schema already at head
+MIGRATION_LOCK_ID = 4_721_983_001
+
 
 def get_url():
-    user = os.getenv("POSTGRES_USER", "dashboard")
-    password = os.getenv("POSTGRES_PASSWORD", "testpass")
-    server = os.getenv("POSTGRES_SERVER", "postgres")
-    db = os.getenv("POSTGRES_DB", "db")
-    return f"postgresql://{user}:{password}@{server}/{db}"
+    return settings.sqlalchemy_database_url
 
 
 def run_migrations_offline():
@@ -69,15 +68,20 @@ def run_migrations_online():
     # )
 
     from src.utility.database.database import engine
+    from src.utility.database.schema import connect_creating_database
     connectable = engine
 
-    with connectable.connect() as connection:
-        context.configure(
-            connection=connection, target_metadata=target_metadata, compare_type=True
-        )
-
-        with context.begin_transaction():
-            context.run_migrations()
+    with connect_creating_database(connectable) as connection:
+        connection.execute(text("SELECT pg_advisory_lock(:id)"), {'id': MIGRATION_LOCK_ID})
+        try:
+            context.configure(
+                connection=connection, target_metadata=target_metadata, compare_type=True
+            )
+
+            with context.begin_transaction():
+                context.run_migrations()
+        finally:
+            connection.execute(text("SELECT pg_advisory_unlock(:id)"), {'id': MIGRATION_LOCK_ID})
 
 
 if context.is_offline_mode():
@@ -0,0 +1,34 @@
+"""Add unclaimed mentorship request index
+
+Partial index of the requests waiting for a mentor, in the order /mentorship_requests/claim_next hands them out. It
+stays small however many requests have been handled, and is created CONCURRENTLY so that requests can still be made
+while this runs.
+
+Revision ID: 04f120bf1d56
+Revises: bcb6b71e78fe
+Create Date: 2026-10-18 06:25:02.467267
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '04f120bf1d56'
+down_revision = 'bcb6b71e78fe'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_mentorship_requests_unclaimed', 'mentorship_requests',
+                        [sa.text('urgency DESC NULLS LAST'), 'id'], unique=False,
+                        postgresql_where=sa.text('resolved = false AND mentor_user_id IS NULL'),
+                        postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_mentorship_requests_unclaimed', table_name='mentorship_requests',
+                      postgresql_concurrently=True)
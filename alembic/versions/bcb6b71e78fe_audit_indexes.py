@@ -0,0 +1,86 @@
+"""Audit indexes
+
+Add primary keys to the prize association tables and indexes to the foreign keys that are queried, and drop indexes
+that no query uses (free text columns, and the duplicates of each table's primary key).
+
+Indexes are created and dropped CONCURRENTLY, so that reads and writes can continue while this runs during an event.
+Only removing duplicate association rows and marking their columns NOT NULL briefly lock the (narrow) association
+tables.
+
+Revision ID: bcb6b71e78fe
+Revises: 3afa0c16a423
+Create Date: 2026-10-18 06:22:31.862523
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'bcb6b71e78fe'
+down_revision = '3afa0c16a423'
+branch_labels = None
+depends_on = None
+
+ASSOCIATION_TABLES = ['prize_project_attempt_association', 'prize_project_winner_association']
+
+# (index name, table, columns)
+ADDED_INDEXES = [
+    ('ix_prize_project_attempt_association_prize_id', 'prize_project_attempt_association', ['prize_id']),
+    ('ix_prize_project_winner_association_prize_id', 'prize_project_winner_association', ['prize_id']),
+    ('ix_users_project_id', 'users', ['project_id']),
+    ('ix_mentorship_requests_participant_user_id', 'mentorship_requests', ['participant_user_id']),
+]
+
+DROPPED_INDEXES = [
+    ('ix_mentorship_requests_id', 'mentorship_requests', ['id']),
+    ('ix_mentorship_requests_title', 'mentorship_requests', ['title']),
+    ('ix_prizes_description', 'prizes', ['description']),
+    ('ix_prizes_id', 'prizes', ['id']),
+    ('ix_prizes_reward', 'prizes', ['reward']),
+    ('ix_prizes_title', 'prizes', ['title']),
+    ('ix_projects_description', 'projects', ['description']),
+    ('ix_projects_id', 'projects', ['id']),
+    ('ix_projects_name', 'projects', ['name']),
+    ('ix_roles_description', 'roles', ['description']),
+    ('ix_roles_id', 'roles', ['id']),
+    ('ix_users_first_name', 'users', ['first_name']),
+    ('ix_users_id', 'users', ['id']),
+    ('ix_users_last_name', 'users', ['last_name']),
+]
+
+
+def upgrade():
+    # Rows without a project or prize are meaningless, and duplicates would prevent adding the primary keys
+    for table in ASSOCIATION_TABLES:
+        op.execute(f"DELETE FROM {table} WHERE project_id IS NULL OR prize_id IS NULL")
+        op.execute(f"DELETE FROM {table} a USING {table} b "
+                   f"WHERE a.ctid < b.ctid AND a.project_id = b.project_id AND a.prize_id = b.prize_id")
+        op.alter_column(table, 'project_id', existing_type=sa.INTEGER(), nullable=False)
+        op.alter_column(table, 'prize_id', existing_type=sa.INTEGER(), nullable=False)
+
+    with op.get_context().autocommit_block():
+        for table in ASSOCIATION_TABLES:
+            op.create_index(f'{table}_pkey', table, ['project_id', 'prize_id'], unique=True,
+                            postgresql_concurrently=True)
+        for name, table, columns in ADDED_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for name, table, _ in DROPPED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
+
+    # Promoting the unique indexes to primary keys does not need to scan the tables again
+    for table in ASSOCIATION_TABLES:
+        op.execute(f"ALTER TABLE {table} ADD CONSTRAINT {table}_pkey PRIMARY KEY USING INDEX {table}_pkey")
+
+
+def downgrade():
+    for table in ASSOCIATION_TABLES:
+        op.drop_constraint(f'{table}_pkey', table, type_='primary')
+        op.alter_column(table, 'prize_id', existing_type=sa.INTEGER(), nullable=True)
+        op.alter_column(table, 'project_id', existing_type=sa.INTEGER(), nullable=True)
+
+    with op.get_context().autocommit_block():
+        for name, table, columns in DROPPED_INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+        for name, table, _ in ADDED_INDEXES:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
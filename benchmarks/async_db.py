@@ -0,0 +1,101 @@
+"""
+Concurrency benchmark for `async def` endpoints, comparing the sync Session they previously used (which blocks the
+event loop for the duration of every query) against the AsyncSession.
+
+Both variants run inside a single event loop, the same as one uvicorn worker, and execute the query made by
+`GET /prizes/all`. A heartbeat task measures how long the event loop is blocked. Use --query-latency-ms to simulate the
+network round trip to a remote database.
+
+Run from the repository root with the database running:
+    python -m benchmarks.async_db --requests 500 --concurrency 50 --query-latency-ms 5
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from sqlalchemy import select, text
+
+from src.utility.database import models
+from src.utility.database.database import SessionLocal, AsyncSessionLocal, async_engine
+
+
+async def sync_session_handler(latency: float):
+    db = SessionLocal()
+    try:
+        db.execute(text("SELECT pg_sleep(:latency)"), {'latency': latency})
+        return db.query(models.PrizeModel).all()
+    finally:
+        db.close()
+
+
+async def async_session_handler(latency: float):
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SELECT pg_sleep(:latency)"), {'latency': latency})
+        return (await db.scalars(select(models.PrizeModel))).all()
+
+
+async def heartbeat(stop: asyncio.Event, interval: float, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run(handler, requests: int, concurrency: int, latency: float) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await handler(latency)
+            latencies.append(time.perf_counter() - start)
+
+    stop = asyncio.Event()
+    lags = []
+    monitor = asyncio.create_task(heartbeat(stop, 0.005, lags))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(requests)])
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    await monitor
+
+    latencies.sort()
+    return {
+        'seconds': elapsed,
+        'requests_per_second': requests / elapsed,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        'max_loop_lag_ms': max(lags, default=0) * 1000,
+    }
+
+
+async def main(args):
+    latency = args.query_latency_ms / 1000
+
+    # Warm up both connection pools
+    await run(sync_session_handler, 10, 5, 0)
+    await run(async_session_handler, 10, 5, 0)
+
+    results = {
+        'before (sync Session)': await run(sync_session_handler, args.requests, args.concurrency, latency),
+        'after (AsyncSession)': await run(async_session_handler, args.requests, args.concurrency, latency),
+    }
+    await async_engine.dispose()
+
+    print(f"{args.requests} requests, concurrency {args.concurrency}, {args.query_latency_ms}ms simulated latency")
+    print(f"{'':24}{'seconds':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'loop lag ms':>14}")
+    for name, result in results.items():
+        print(f"{name:24}{result['seconds']:>10.2f}{result['requests_per_second']:>10.1f}{result['p50_ms']:>10.1f}"
+              f"{result['p95_ms']:>10.1f}{result['max_loop_lag_ms']:>14.1f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--concurrency', type=int, default=50)
+    parser.add_argument('--query-latency-ms', type=float, default=5)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,292 @@
+"""
+Generate a synthetic hackathon dataset for benchmarking and profiling. The same --size and --seed always produce
+exactly the same rows (including ids and password hashes), so runs can be compared against each other.
+
+Sizes:
+    small     500 users, 120 projects, 20 prizes, 300 mentorship requests
+    event     5,000 users, 1,200 projects, 60 prizes, 3,000 mentorship requests
+    stress    50,000 users, 12,000 projects, 200 prizes, 30,000 mentorship requests
+
+Every project has long text fields and attempts 3 to 15 prizes. About a third of the mentorship requests are
+unresolved, forming the mentors' backlog. Users are participant-<n>@example.com, organizer-<n>@example.com and
+admin@example.com, all with the password given by --password.
+
+Rows are loaded with COPY into the database configured by DATABASE_URL, which must already have its tables and roles
+(start the application once, or run `alembic upgrade head` and start it). Existing users, projects, prizes and
+mentorship requests are deleted first when --reset is given; otherwise those tables must be empty.
+
+Run from the repository root:
+    python -m benchmarks.dataset --size event --seed 0 --reset
+"""
+import argparse
+import csv
+import io
+import random
+import string
+import time
+from typing import Iterable, Iterator, List, Sequence
+
+from sqlalchemy import text
+
+from src.utility.database.database import engine
+from src.utility.invalidation import publish_invalidation
+from src.utility.password_hashing import pwd_context
+
+SIZES = {
+    'small': {'users': 500, 'projects': 120, 'prizes': 20, 'mentorship_requests': 300},
+    'event': {'users': 5_000, 'projects': 1_200, 'prizes': 60, 'mentorship_requests': 3_000},
+    'stress': {'users': 50_000, 'projects': 12_000, 'prizes': 200, 'mentorship_requests': 30_000},
+}
+
+ORGANIZER_FRACTION = 0.02
+MAX_TEAM_SIZE = 4
+ATTEMPTED_PRIZES = (3, 15)
+UNRESOLVED_FRACTION = 0.35
+COPY_BATCH_ROWS = 10_000
+COPY_NULL = r'\N'
+
+# Tables filled by the generator, in the order they are loaded (and truncated by --reset)
+TABLES = ['projects', 'users', 'prizes', 'prize_project_attempt_association', 'prize_project_winner_association',
+          'mentorship_requests']
+
+FIRST_NAMES = ['Ada', 'Alan', 'Grace', 'Linus', 'Margaret', 'Dennis', 'Barbara', 'Ken', 'Radia', 'Guido', 'Frances',
+               'Donald', 'Katherine', 'Tim', 'Hedy', 'Edsger', 'Shafi', 'John', 'Anita', 'Vint']
+LAST_NAMES = ['Lovelace', 'Turing', 'Hopper', 'Torvalds', 'Hamilton', 'Ritchie', 'Liskov', 'Thompson', 'Perlman',
+              'van Rossum', 'Allen', 'Knuth', 'Johnson', 'Berners-Lee', 'Lamarr', 'Dijkstra', 'Goldwasser', 'McCarthy',
+              'Borg', 'Cerf']
+TECHNOLOGIES = ['Python', 'FastAPI', 'React', 'TypeScript', 'PostgreSQL', 'Arduino', 'Raspberry Pi', 'Unity', 'Swift',
+                'Kotlin', 'Rust', 'Go', 'TensorFlow', 'PyTorch', 'Firebase', 'Docker', 'Flutter', 'OpenCV', 'Three.js',
+                'WebRTC']
+SPONSORS = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises', 'Cyberdyne']
+REWARDS = ['Nintendo Switch', 'Raspberry Pi kit', 'Mechanical keyboard', 'Drone', 'Gift card', 'Headphones', 'Monitor']
+WORDS = ('we built an app that helps students find study groups using real time location data and a simple '
+         'matching algorithm the hardest part was getting the sensors to talk to the backend over bluetooth while '
+         'keeping battery usage low our team learned how to design a database schema deploy containers and split '
+         'work across time zones next we want to add notifications accessibility improvements offline support and '
+         'a recommendation model trained on anonymized usage data the frontend renders a live map with clusters of '
+         'nearby users and the api exposes endpoints for authentication projects prizes and mentorship').split()
+
+
+def paragraph(rng: random.Random, min_words: int, max_words: int) -> str:
+    words = rng.choices(WORDS, k=rng.randint(min_words, max_words))
+    sentences = [' '.join(words[start:start + 12]).capitalize() for start in range(0, len(words), 12)]
+    return '. '.join(sentences) + '.'
+
+
+def deterministic_password_hash(rng: random.Random, password: str) -> str:
+    """
+    Hash a password with a salt drawn from the generator, rather than a random one, so that the dataset is identical
+    on every run.
+    """
+    alphabet = './' + string.ascii_uppercase + string.ascii_lowercase + string.digits
+    # The last character of a bcrypt salt only carries 2 bits, so it must be one of these
+    salt = ''.join(rng.choices(alphabet, k=21)) + rng.choice('.Oeu')
+    return pwd_context.handler().using(salt=salt).hash(password)
+
+
+# -------------------------------------------------------------------------------
+#
+#           Row Generation
+#
+# -------------------------------------------------------------------------------
+
+
+class Dataset:
+    """
+    Rows of every table, generated in a fixed order from a single seeded random number generator.
+    """
+
+    def __init__(self, size: dict, seed: int, password: str, role_ids: dict):
+        self.rng = random.Random(seed)
+        self.size = size
+        self.password_hash = deterministic_password_hash(self.rng, password)
+        self.role_ids = role_ids
+
+        self.organizer_ids: List[int] = []
+        self.participant_ids: List[int] = []
+        self.selectable_prize_ids: List[int] = []
+
+    def projects(self) -> Iterator[tuple]:
+        rng = self.rng
+        for project_id in range(1, self.size['projects'] + 1):
+            technologies = ', '.join(rng.sample(TECHNOLOGIES, rng.randint(2, 6)))
+            yield (
+                project_id, f'Project {project_id}: {paragraph(rng, 2, 5)[:-1]}',
+                f'https://example.com/screenshots/{project_id}.png',
+                f'https://github.com/example/project-{project_id}', f'https://example.com/videos/{project_id}',
+                paragraph(rng, 80, 250), paragraph(rng, 30, 150), paragraph(rng, 30, 150), paragraph(rng, 30, 150),
+                technologies, paragraph(rng, 30, 150), paragraph(rng, 30, 150), paragraph(rng, 30, 150),
+                rng.random() < 0.8, rng.random() < 0.3,
+            )
+
+    def users(self) -> Iterator[tuple]:
+        rng = self.rng
+        organizers = max(int(self.size['users'] * ORGANIZER_FRACTION), 1)
+
+        # Participants join projects in teams of 1 to MAX_TEAM_SIZE, until every project has a team
+        project_id, team_left = 1, rng.randint(1, MAX_TEAM_SIZE)
+        for user_id in range(1, self.size['users'] + 1):
+            first_name, last_name = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+            if user_id == 1:
+                yield user_id, 'admin@example.com', first_name, last_name, self.password_hash, 0, False, \
+                    self.role_ids['admin'], None
+            elif user_id <= organizers + 1:
+                self.organizer_ids.append(user_id)
+                yield user_id, f'organizer-{user_id}@example.com', first_name, last_name, self.password_hash, 0, \
+                    False, self.role_ids['organizer'], None
+            else:
+                self.participant_ids.append(user_id)
+                user_project_id = project_id if project_id <= self.size['projects'] else None
+                team_left -= 1
+                if team_left == 0:
+                    project_id, team_left = project_id + 1, rng.randint(1, MAX_TEAM_SIZE)
+                yield user_id, f'participant-{user_id}@example.com', first_name, last_name, self.password_hash, 0, \
+                    False, self.role_ids['participant'], user_project_id
+
+    def prizes(self) -> Iterator[tuple]:
+        rng = self.rng
+        for prize_id in range(1, self.size['prizes'] + 1):
+            selectable = rng.random() < 0.9
+            if selectable:
+                self.selectable_prize_ids.append(prize_id)
+            yield (prize_id, f'Best {rng.choice(TECHNOLOGIES)} Hack {prize_id}', paragraph(rng, 10, 40),
+                   rng.choice(REWARDS), rng.choice(SPONSORS), rng.randint(0, 10), selectable)
+
+    def prize_attempts(self) -> Iterator[tuple]:
+        rng = self.rng
+        low, high = ATTEMPTED_PRIZES
+        for project_id in range(1, self.size['projects'] + 1):
+            count = min(rng.randint(low, high), len(self.selectable_prize_ids))
+            for prize_id in sorted(rng.sample(self.selectable_prize_ids, count)):
+                yield project_id, prize_id
+
+    def prize_winners(self) -> Iterator[tuple]:
+        rng = self.rng
+        for prize_id in self.selectable_prize_ids:
+            if rng.random() < 0.5:
+                for project_id in sorted(rng.sample(range(1, self.size['projects'] + 1), rng.randint(1, 3))):
+                    yield project_id, prize_id
+
+    def mentorship_requests(self) -> Iterator[tuple]:
+        rng = self.rng
+        for request_id in range(1, self.size['mentorship_requests'] + 1):
+            # Older requests have mostly been resolved, leaving a backlog of the newest ones
+            resolved = rng.random() > UNRESOLVED_FRACTION
+            mentor_id = rng.choice(self.organizer_ids) if resolved or rng.random() < 0.4 else None
+            yield (request_id, f'Help with {rng.choice(TECHNOLOGIES)}', paragraph(rng, 15, 80),
+                   rng.choice(TECHNOLOGIES), rng.randint(1, 5), '', resolved, rng.choice(self.participant_ids),
+                   mentor_id)
+
+
+TABLE_COLUMNS = {
+    'projects': ['id', 'name', 'image_url', 'github_link', 'video_link', 'description', 'inspiration', 'functionality',
+                 'architecture', 'technologiesUsed', 'challengesFaced', 'lessonsLearned', 'nextSteps',
+                 'inPersonProject', 'requiresPowerOutlet'],
+    'users': ['id', 'email', 'first_name', 'last_name', 'password', 'token_version', 'disabled', 'role_id',
+              'project_id'],
+    'prizes': ['id', 'title', 'description', 'reward', 'sponsor', 'priority', 'selectable'],
+    'prize_project_attempt_association': ['project_id', 'prize_id'],
+    'prize_project_winner_association': ['project_id', 'prize_id'],
+    'mentorship_requests': ['id', 'title', 'description', 'technology_used', 'urgency', 'image_url', 'resolved',
+                            'participant_user_id', 'mentor_user_id'],
+}
+
+
+# -------------------------------------------------------------------------------
+#
+#           Loading
+#
+# -------------------------------------------------------------------------------
+
+
+def copy_rows(cursor, table: str, columns: Sequence[str], rows: Iterable[tuple]) -> int:
+    """
+    Load rows into a table with COPY, in batches of COPY_BATCH_ROWS so that large tables are not held in memory.
+
+    :param cursor: psycopg2 cursor
+    :param table: Table to load
+    :param columns: Columns of the table, in the order of the values in each row
+    :param rows: Rows to load
+    :return: Number of rows loaded
+    """
+    statement = f"""COPY {table} ({', '.join(f'"{column}"' for column in columns)}) """ \
+                f"""FROM STDIN WITH (FORMAT csv, NULL '{COPY_NULL}')"""
+    count = 0
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        buffer.seek(0)
+        cursor.copy_expert(statement, buffer)
+        buffer.seek(0)
+        buffer.truncate()
+
+    for row in rows:
+        writer.writerow([COPY_NULL if value is None else value for value in row])
+        count += 1
+        if count % COPY_BATCH_ROWS == 0:
+            flush()
+    if buffer.tell():
+        flush()
+
+    return count
+
+
+def load_dataset(size_name: str, seed: int, password: str, reset: bool):
+    with engine.begin() as connection:
+        # Large COPYs can take longer than the statement timeout set for the application
+        connection.execute(text("SET LOCAL statement_timeout = 0"))
+
+        role_ids = dict(connection.execute(text("SELECT name, id FROM roles")).all())
+        missing_roles = {'admin', 'organizer', 'participant'} - set(role_ids)
+        if missing_roles:
+            raise SystemExit(f"Roles {', '.join(sorted(missing_roles))} do not exist. Start the application once to "
+                             f"create them.")
+
+        if reset:
+            connection.execute(text(f"TRUNCATE {', '.join(TABLES)} RESTART IDENTITY CASCADE"))
+        else:
+            for table in TABLES:
+                if connection.execute(text(f"SELECT EXISTS (SELECT 1 FROM {table})")).scalar():
+                    raise SystemExit(f"Table {table} is not empty. Use --reset to delete the existing data.")
+
+        dataset = Dataset(SIZES[size_name], seed, password, role_ids)
+        rows = {
+            'projects': dataset.projects(),
+            'users': dataset.users(),
+            'prizes': dataset.prizes(),
+            'prize_project_attempt_association': dataset.prize_attempts(),
+            'prize_project_winner_association': dataset.prize_winners(),
+            'mentorship_requests': dataset.mentorship_requests(),
+        }
+
+        cursor = connection.connection.cursor()
+        for table in TABLES:
+            start = time.perf_counter()
+            count = copy_rows(cursor, table, TABLE_COLUMNS[table], rows[table])
+            print(f"{table:36}{count:>10} rows{time.perf_counter() - start:>10.2f}s")
+
+            # Ids were given explicitly, so move the id sequence past them
+            if 'id' in TABLE_COLUMNS[table]:
+                connection.execute(text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                                        f"(SELECT coalesce(max(id), 0) + 1 FROM {table}), false)"))
+
+        connection.execute(text("ANALYZE"))
+
+        # Running workers may have cached users and prizes that no longer exist
+        publish_invalidation(connection, 'user', '')
+        publish_invalidation(connection, 'prize', '')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', choices=list(SIZES), default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--password', default='password', help='Password of every generated user')
+    parser.add_argument('--reset', action='store_true',
+                        help='Delete all existing users, projects, prizes and mentorship requests first')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    load_dataset(args.size, args.seed, args.password, args.reset)
+    print(f"Loaded the {args.size} dataset (seed {args.seed}) in {time.perf_counter() - start:.2f}s")
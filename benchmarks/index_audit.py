@@ -0,0 +1,142 @@
+"""
+EXPLAIN ANALYZE the hot queries affected by the index audit migration (bcb6b71e78fe), with the indexes from before and
+after it.
+
+The schema from before the migration is recreated inside a transaction (dropping the association primary keys and
+foreign key indexes, and recreating the text indexes), measured, and rolled back, as are the writes made by the
+queries. The schema and data are left unchanged, but the tables are locked while it runs, so only run this against a
+development database.
+
+Run from the repository root, after `alembic upgrade head` and with a dataset loaded by benchmarks.dataset:
+    python -m benchmarks.index_audit --repeat 5
+"""
+import argparse
+import importlib.util
+import statistics
+from pathlib import Path
+from typing import List
+
+from sqlalchemy import text
+
+from src.utility.database.database import engine
+
+MIGRATION_PATH = Path(__file__).resolve().parents[1] / 'alembic' / 'versions' / 'bcb6b71e78fe_audit_indexes.py'
+
+# name -> statement, as issued by the application
+QUERIES = {
+    'projects page: attempted prizes': """
+        SELECT a.project_id, prizes.* FROM prizes
+        JOIN prize_project_attempt_association a ON prizes.id = a.prize_id
+        WHERE a.project_id = ANY(:project_ids)""",
+    'projects attempting a prize': """
+        SELECT project_id FROM prize_project_attempt_association WHERE prize_id = :prize_id""",
+    'remove attempted prize': """
+        DELETE FROM prize_project_attempt_association WHERE project_id = :project_id AND prize_id = :prize_id""",
+    'project team members': """
+        SELECT * FROM users WHERE project_id = :project_id""",
+    'participant mentorship requests': """
+        SELECT * FROM mentorship_requests WHERE participant_user_id = :user_id""",
+    'update project text': """
+        UPDATE projects SET name = name || ' ', description = description || ' ' WHERE id = :project_id""",
+    'import 500 users': """
+        INSERT INTO users (email, first_name, last_name, password, token_version, disabled)
+        SELECT 'index-audit-' || n || '@example.com', 'First ' || n, 'Last ' || n, '', 0, false
+        FROM generate_series(1, 500) n""",
+}
+
+
+def load_migration():
+    spec = importlib.util.spec_from_file_location('audit_indexes', MIGRATION_PATH)
+    migration = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(migration)
+    return migration
+
+
+def recreate_previous_indexes(connection, migration):
+    for table in migration.ASSOCIATION_TABLES:
+        connection.execute(text(f"ALTER TABLE {table} DROP CONSTRAINT {table}_pkey"))
+    for name, _, _ in migration.ADDED_INDEXES:
+        connection.execute(text(f'DROP INDEX "{name}"'))
+    for name, table, columns in migration.DROPPED_INDEXES:
+        connection.execute(text(f'CREATE INDEX "{name}" ON {table} ({", ".join(columns)})'))
+
+
+def get_parameters(connection) -> dict:
+    project_id, prize_id = connection.execute(text(
+        "SELECT project_id, prize_id FROM prize_project_attempt_association ORDER BY project_id, prize_id LIMIT 1"
+    )).one()
+    user_id = connection.execute(text(
+        "SELECT participant_user_id FROM mentorship_requests WHERE participant_user_id IS NOT NULL LIMIT 1"
+    )).scalar()
+    project_ids = connection.execute(text(
+        "SELECT array_agg(id) FROM (SELECT id FROM projects ORDER BY id LIMIT 100) page"
+    )).scalar()
+
+    return {'project_id': project_id, 'prize_id': prize_id, 'user_id': user_id, 'project_ids': project_ids}
+
+
+def plan_scans(node: dict) -> List[str]:
+    """
+    List the scans in a plan, such as "Seq Scan on users" or "Index Scan using ix_users_project_id".
+    """
+    scans = []
+    if 'Scan' in node['Node Type']:
+        if 'Index Name' in node:
+            scans.append(f"{node['Node Type']} using {node['Index Name']}")
+        elif 'Relation Name' in node:
+            scans.append(f"{node['Node Type']} on {node['Relation Name']}")
+    for child in node.get('Plans', []):
+        scans.extend(plan_scans(child))
+
+    return scans
+
+
+def measure(connection, parameters: dict, repeat: int) -> dict:
+    results = {}
+    for name, query in QUERIES.items():
+        timings, plan = [], None
+        for _ in range(repeat):
+            savepoint = connection.begin_nested()
+            explained = connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"), parameters)\
+                .scalar()[0]
+            savepoint.rollback()
+
+            timings.append(explained['Execution Time'])
+            plan = explained['Plan']
+
+        results[name] = {
+            'ms': statistics.median(timings),
+            'buffers': plan.get('Shared Hit Blocks', 0) + plan.get('Shared Read Blocks', 0),
+            'plan': ', '.join(plan_scans(plan)) or plan['Node Type'],
+        }
+
+    return results
+
+
+def main(args):
+    migration = load_migration()
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+        try:
+            parameters = get_parameters(connection)
+            measure(connection, parameters, 1)  # Warm up the cache
+            after = measure(connection, parameters, args.repeat)
+            recreate_previous_indexes(connection, migration)
+            before = measure(connection, parameters, args.repeat)
+        finally:
+            transaction.rollback()
+
+    print(f"Median execution time of {args.repeat} runs, and shared buffers touched")
+    print(f"{'':34}{'before ms':>12}{'after ms':>12}{'before buf':>12}{'after buf':>12}")
+    for name in QUERIES:
+        print(f"{name:34}{before[name]['ms']:>12.3f}{after[name]['ms']:>12.3f}"
+              f"{before[name]['buffers']:>12}{after[name]['buffers']:>12}")
+        print(f"    before: {before[name]['plan']}")
+        print(f"    after:  {after[name]['plan']}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    main(parser.parse_args())
@@ -0,0 +1,425 @@
+"""
+Load test that replays hackathon traffic against a running server, and reports p50/p95/p99 latency and requests per
+second for each route.
+
+Scenarios (each runs for --duration seconds with --users concurrent virtual users):
+    login_storm        Participants logging in at the start of the event (POST /auth/login)
+    participant_poll   Participant dashboards polling GET /auth/profile and GET /prizes/all, sending If-None-Match
+    project_edit       Teams saving their project (PUT /projects/{id}) and the prizes it is attempting
+                       (POST /projects/{id}/attempt_prizes)
+    mentor_queue       Mentors working through open requests: GET /mentorship_requests/all?resolved=false, then
+                       POST /mentorship_requests/{id}/set_mentor/{user_id} and GET /mentorship_requests/{id}
+
+Test users, projects, prizes and mentorship requests (all with a `loadtest` prefix) are created directly in the database
+configured by DATABASE_URL, and reused by later runs. Requests other than logins use tokens issued directly, so that
+only the login storm pays for password hashing.
+
+Run from the repository root, against a server started with `startup.sh` or in-process with --in-process:
+    python -m benchmarks.load_test --url http://localhost:5001 --duration 30 --users 50 --save baseline.json
+    python -m benchmarks.load_test --url http://localhost:5001 --duration 30 --users 50 --compare baseline.json
+
+With --compare, the exit status is 1 if the p95 latency or throughput of any route is worse than the baseline by more
+than --tolerance percent.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import math
+import platform
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from src.routers.auth import create_user_access_token
+from src.utility.database import models
+from src.utility.database.database import SessionLocal
+from src.utility.password_hashing import hash_password_sync
+
+FIXTURE_PREFIX = 'loadtest'
+FIXTURE_PASSWORD = 'loadtest-password'
+FIXTURE_PRIZES = 12
+FIXTURE_REQUESTS_PER_PARTICIPANT = 2
+TOKEN_LIFETIME = datetime.timedelta(hours=2)
+PERCENTILES = (50, 95, 99)
+
+
+# -------------------------------------------------------------------------------
+#
+#           Fixture
+#
+# -------------------------------------------------------------------------------
+
+
+class Fixture:
+    def __init__(self):
+        self.participants: List[dict] = []  # {'id', 'email', 'token', 'project_id'}
+        self.mentors: List[dict] = []  # {'id', 'email', 'token'}
+        self.prize_ids: List[int] = []
+
+
+def create_fixture(participant_count: int, mentor_count: int) -> Fixture:
+    """
+    Create (or reuse, if a previous run created them) the participants, mentors, projects, prizes and mentorship
+    requests that the scenarios act on, and issue an access token for every user.
+    """
+    fixture = Fixture()
+    password = hash_password_sync(FIXTURE_PASSWORD)
+
+    with SessionLocal() as db:
+        roles = {role.name: role for role in db.scalars(select(models.RoleModel))}
+
+        prizes = db.scalars(select(models.PrizeModel).where(models.PrizeModel.title.like(f'{FIXTURE_PREFIX} %'))
+                            .order_by(models.PrizeModel.id)).all()
+        for number in range(len(prizes), FIXTURE_PRIZES):
+            prize = models.PrizeModel(title=f'{FIXTURE_PREFIX} prize {number}', description='Load test prize',
+                                      reward='Sticker', sponsor=FIXTURE_PREFIX, priority=0, selectable=True)
+            db.add(prize)
+            prizes.append(prize)
+        db.flush()
+        fixture.prize_ids = [prize.id for prize in prizes]
+
+        def get_or_create_user(email: str, role: str) -> models.UserModel:
+            user = db.scalars(select(models.UserModel).options(joinedload(models.UserModel.role))
+                              .where(models.UserModel.email == email)).first()
+            if user is None:
+                user = models.UserModel(email=email, first_name=FIXTURE_PREFIX, last_name=email.split('@')[0],
+                                        password=password, disabled=False, role=roles[role])
+                db.add(user)
+            return user
+
+        participants = [get_or_create_user(f'{FIXTURE_PREFIX}-participant-{number}@example.com', 'participant')
+                        for number in range(participant_count)]
+        mentors = [get_or_create_user(f'{FIXTURE_PREFIX}-mentor-{number}@example.com', 'organizer')
+                   for number in range(mentor_count)]
+        db.flush()
+
+        for participant in participants:
+            if participant.project_id is None:
+                project = models.ProjectModel(**project_body(participant.id, 0))
+                db.add(project)
+                db.flush()
+                participant.project_id = project.id
+
+            existing_requests = db.query(models.MentorshipRequestModel) \
+                .filter(models.MentorshipRequestModel.participant_user_id == participant.id).count()
+            for number in range(existing_requests, FIXTURE_REQUESTS_PER_PARTICIPANT):
+                db.add(models.MentorshipRequestModel(
+                    title=f'{FIXTURE_PREFIX} request {number}', description='Our build is failing',
+                    technology_used='Python', urgency=number % 5 + 1, image_url='', resolved=False,
+                    participant_user_id=participant.id, mentor_user_id=mentors[0].id if mentors else None,
+                ))
+        db.commit()
+
+        fixture.participants = [{'id': user.id, 'email': user.email, 'project_id': user.project_id,
+                                 'token': create_user_access_token(user, TOKEN_LIFETIME)} for user in participants]
+        fixture.mentors = [{'id': user.id, 'email': user.email,
+                            'token': create_user_access_token(user, TOKEN_LIFETIME)} for user in mentors]
+
+    return fixture
+
+
+def project_body(owner_id: int, revision: int) -> dict:
+    return {
+        'name': f'{FIXTURE_PREFIX} project {owner_id}',
+        'image_url': 'https://example.com/screenshot.png',
+        'github_link': f'https://github.com/example/{FIXTURE_PREFIX}-{owner_id}',
+        'video_link': 'https://example.com/demo',
+        'description': f'Revision {revision} of a project that helps people find study groups. ' * 4,
+        'inspiration': 'We kept missing each other in the library.',
+        'functionality': 'Matches students by course and schedule.',
+        'architecture': 'React frontend and a FastAPI backend.',
+        'technologiesUsed': 'Python, TypeScript, PostgreSQL',
+        'challengesFaced': 'Time zones.',
+        'lessonsLearned': 'Start with the data model.',
+        'nextSteps': 'Calendar integration.',
+        'inPersonProject': True,
+        'requiresPowerOutlet': bool(revision % 2),
+    }
+
+
+# -------------------------------------------------------------------------------
+#
+#           Recording
+#
+# -------------------------------------------------------------------------------
+
+
+class Recorder:
+    """
+    Latencies and response statuses of every request made during one scenario, grouped by route template.
+    """
+
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.statuses: Dict[str, Counter] = defaultdict(Counter)
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> \
+            Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+        except httpx.HTTPError as error:
+            self.latencies[route].append(time.perf_counter() - start)
+            self.statuses[route][type(error).__name__] += 1
+            return None
+
+        self.latencies[route].append(time.perf_counter() - start)
+        self.statuses[route][response.status_code] += 1
+        return response
+
+    def summary(self, seconds: float) -> Dict[str, dict]:
+        routes = {}
+        for route, latencies in sorted(self.latencies.items()):
+            latencies.sort()
+            statuses = self.statuses[route]
+            errors = sum(count for status, count in statuses.items()
+                         if not isinstance(status, int) or status >= 400)
+            routes[route] = {
+                'requests': len(latencies),
+                'requests_per_second': len(latencies) / seconds,
+                'errors': errors,
+                'statuses': {str(status): count for status, count in statuses.items()},
+                **{f'p{p}_ms': percentile(latencies, p) * 1000 for p in PERCENTILES},
+            }
+        return routes
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    return sorted_values[max(math.ceil(p / 100 * len(sorted_values)) - 1, 0)]
+
+
+# -------------------------------------------------------------------------------
+#
+#           Scenarios
+#
+# -------------------------------------------------------------------------------
+
+
+def bearer(user: dict) -> dict:
+    return {'Authorization': f"Bearer {user['token']}"}
+
+
+async def login_storm(client: httpx.AsyncClient, recorder: Recorder, fixture: Fixture, rng: random.Random, state: dict):
+    participant = rng.choice(fixture.participants)
+    await recorder.request(client, 'POST /auth/login', 'POST', '/auth/login',
+                           data={'username': participant['email'], 'password': FIXTURE_PASSWORD})
+
+
+async def participant_poll(client: httpx.AsyncClient, recorder: Recorder, fixture: Fixture, rng: random.Random,
+                           state: dict):
+    participant = state.setdefault('participant', rng.choice(fixture.participants))
+    await recorder.request(client, 'GET /auth/profile', 'GET', '/auth/profile', headers=bearer(participant))
+
+    # Dashboards revalidate the prize list with the ETag of the copy they already have
+    headers = bearer(participant)
+    if 'prizes_etag' in state:
+        headers['If-None-Match'] = state['prizes_etag']
+    response = await recorder.request(client, 'GET /prizes/all', 'GET', '/prizes/all', headers=headers)
+    if response is not None and response.status_code == 200 and 'etag' in response.headers:
+        state['prizes_etag'] = response.headers['etag']
+
+
+async def project_edit(client: httpx.AsyncClient, recorder: Recorder, fixture: Fixture, rng: random.Random,
+                       state: dict):
+    participant = state.setdefault('participant', rng.choice(fixture.participants))
+    project_id = participant['project_id']
+    state['revision'] = state.get('revision', 0) + 1
+
+    await recorder.request(client, 'PUT /projects/{project_id}', 'PUT', f'/projects/{project_id}',
+                           headers=bearer(participant), json=project_body(participant['id'], state['revision']))
+    await recorder.request(client, 'POST /projects/{project_id}/attempt_prizes', 'POST',
+                           f'/projects/{project_id}/attempt_prizes', headers=bearer(participant),
+                           json=rng.sample(fixture.prize_ids, rng.randint(1, 3)))
+
+
+async def mentor_queue(client: httpx.AsyncClient, recorder: Recorder, fixture: Fixture, rng: random.Random,
+                       state: dict):
+    mentor = state.setdefault('mentor', rng.choice(fixture.mentors))
+    response = await recorder.request(client, 'GET /mentorship_requests/all', 'GET', '/mentorship_requests/all',
+                                      headers=bearer(mentor), params={'resolved': 'false', 'limit': 20})
+    if response is None or response.status_code != 200 or not response.json()['items']:
+        return
+
+    request_id = rng.choice(response.json()['items'])['id']
+    await recorder.request(client, 'POST /mentorship_requests/{id}/set_mentor/{user_id}', 'POST',
+                           f"/mentorship_requests/{request_id}/set_mentor/{mentor['id']}", headers=bearer(mentor))
+    await recorder.request(client, 'GET /mentorship_requests/{id}', 'GET', f'/mentorship_requests/{request_id}',
+                           headers=bearer(mentor))
+
+
+Scenario = Callable[[httpx.AsyncClient, Recorder, Fixture, random.Random, dict], Awaitable[None]]
+
+SCENARIOS: Dict[str, Scenario] = {
+    'login_storm': login_storm,
+    'participant_poll': participant_poll,
+    'project_edit': project_edit,
+    'mentor_queue': mentor_queue,
+}
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, fixture: Fixture, users: int, duration: float,
+                       think_time: float, seed: int) -> dict:
+    """
+    Run a scenario in a closed loop: each virtual user repeats it (pausing for think_time between iterations) until
+    duration seconds have passed.
+    """
+    recorder = Recorder()
+    deadline = time.perf_counter() + duration
+
+    async def virtual_user(number: int):
+        rng = random.Random(seed * 100_003 + number)
+        state = {}
+        while time.perf_counter() < deadline:
+            await scenario(client, recorder, fixture, rng, state)
+            if think_time:
+                await asyncio.sleep(rng.uniform(0.5, 1.5) * think_time)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[virtual_user(number) for number in range(users)])
+    return recorder.summary(time.perf_counter() - start)
+
+
+# -------------------------------------------------------------------------------
+#
+#           Reporting
+#
+# -------------------------------------------------------------------------------
+
+
+def print_results(results: Dict[str, Dict[str, dict]]):
+    print(f"{'':56}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    for scenario, routes in results.items():
+        print(scenario)
+        for route, result in routes.items():
+            print(f"  {route:54}{result['requests']:>10}{result['requests_per_second']:>10.1f}"
+                  f"{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}{result['p99_ms']:>10.1f}{result['errors']:>8}")
+
+
+def compare_results(results: Dict[str, Dict[str, dict]], baseline: Dict[str, Dict[str, dict]],
+                    tolerance: float) -> List[str]:
+    """
+    Print the change in p95 latency and throughput of each route against a saved baseline.
+
+    :param results: Results of this run
+    :param baseline: Results of the baseline run
+    :param tolerance: Percentage by which a route may be slower before it is reported as a regression
+    :return: Descriptions of the routes that regressed
+    """
+    regressions = []
+    print(f"\n{'compared to baseline':56}{'p95 ms':>20}{'change':>10}{'req/s':>20}{'change':>10}")
+    for scenario, routes in results.items():
+        for route, result in routes.items():
+            before = baseline.get(scenario, {}).get(route)
+            if before is None:
+                continue
+
+            p95_change = (result['p95_ms'] / before['p95_ms'] - 1) * 100 if before['p95_ms'] else 0
+            rps_change = (result['requests_per_second'] / before['requests_per_second'] - 1) * 100 \
+                if before['requests_per_second'] else 0
+            regressed = p95_change > tolerance or rps_change < -tolerance
+            print(f"  {route:54}{before['p95_ms']:>9.1f} -> {result['p95_ms']:>7.1f}{p95_change:>+9.1f}%"
+                  f"{before['requests_per_second']:>9.1f} -> {result['requests_per_second']:>7.1f}"
+                  f"{rps_change:>+9.1f}%{'  REGRESSION' if regressed else ''}")
+            if regressed:
+                regressions.append(f'{scenario}: {route}')
+
+    return regressions
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args) -> int:
+    scenarios = args.scenarios.split(',') if args.scenarios else list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    fixture = create_fixture(args.participants, args.mentors)
+
+    if args.in_process:
+        from src.main import app
+        await app.router.startup()
+        client = httpx.AsyncClient(app=app, base_url='http://load-test', timeout=args.timeout)
+    else:
+        limits = httpx.Limits(max_connections=args.users, max_keepalive_connections=args.users)
+        client = httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits)
+
+    results = {}
+    try:
+        for name in scenarios:
+            results[name] = await run_scenario(client, SCENARIOS[name], fixture, args.users, args.duration,
+                                               args.think_ms / 1000, args.seed)
+    finally:
+        await client.aclose()
+        if args.in_process:
+            await app.router.shutdown()
+
+    print(f"{args.users} users, {args.duration}s per scenario, {args.think_ms}ms think time, "
+          f"{'in-process' if args.in_process else args.url}")
+    print_results(results)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump({
+                'meta': {
+                    'recorded_at': datetime.datetime.utcnow().isoformat(),
+                    'git_revision': git_revision(),
+                    'python': platform.python_version(),
+                    'target': 'in-process' if args.in_process else args.url,
+                    'users': args.users,
+                    'duration': args.duration,
+                    'think_ms': args.think_ms,
+                    'seed': args.seed,
+                },
+                'results': results,
+            }, file, indent=2)
+        print(f"\nSaved results to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare_results(results, baseline['results'], args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} routes regressed by more than {args.tolerance}%")
+            return 1
+
+    return 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--url', default='http://localhost:5001', help='Base URL of the server under test')
+    parser.add_argument('--in-process', action='store_true',
+                        help='Run the application in this process instead of connecting to --url')
+    parser.add_argument('--scenarios', help=f"Comma separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument('--users', type=int, default=50, help='Concurrent virtual users per scenario')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds to run each scenario for')
+    parser.add_argument('--think-ms', type=float, default=0, help='Average pause between iterations of a user')
+    parser.add_argument('--participants', type=int, default=200)
+    parser.add_argument('--mentors', type=int, default=10)
+    parser.add_argument('--timeout', type=float, default=30, help='Seconds before a request is counted as failed')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--save', metavar='PATH', help='Save the results as a JSON baseline')
+    parser.add_argument('--compare', metavar='PATH', help='Compare the results against a saved baseline')
+    parser.add_argument('--tolerance', type=float, default=10,
+                        help='Percentage change in p95 latency or throughput reported as a regression')
+    sys.exit(asyncio.run(main(parser.parse_args())))
@@ -0,0 +1,127 @@
+"""
+Round trips and latency of the update endpoints (PUT /projects/{id}, /prizes/{id}, /roles/{id} and
+/mentorship_requests/{id}), comparing the previous pattern against update_by_id_db.
+
+Previously each update selected the row to check that it exists, updated it, committed, selected it again, and then
+lazily loaded any relationships in the response model. update_by_id_db updates and loads the row in one
+UPDATE ... RETURNING statement.
+
+Each update writes back the row's current values, so the data is left unchanged. Use --round-trip-latency-ms to
+simulate the network latency to a remote database, which is added to every statement and commit.
+
+Run from the repository root with the database running (and populated, e.g. by benchmarks.dataset):
+    python -m benchmarks.update_round_trips --updates 200 --round-trip-latency-ms 1
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import event
+
+from src.utility.database import models
+from src.utility.database.database import SessionLocal, engine
+from src.utility.database.loaders import project_load_options
+from src.utility.repository import update_by_id_db
+from src.utility.schemas.MentorshipRequest import MentorshipRequest, MentorshipRequestCreate
+from src.utility.schemas.Prize import Prize, PrizeCreate
+from src.utility.schemas.Project import Project, ProjectCreate
+from src.utility.schemas.Role import Role, RoleCreate
+
+# model, request schema, response schema, loader options used by the endpoint
+ENTITIES = {
+    'project': (models.ProjectModel, ProjectCreate, Project, project_load_options),
+    'prize': (models.PrizeModel, PrizeCreate, Prize, ()),
+    'role': (models.RoleModel, RoleCreate, Role, ()),
+    'mentorship_request': (models.MentorshipRequestModel, MentorshipRequestCreate, MentorshipRequest, ()),
+}
+
+
+def update_before(db, model, response_schema, options, entity_id, values):
+    if db.query(model).filter(model.id == entity_id).first() is None:
+        raise LookupError(entity_id)
+
+    db.query(model).filter(model.id == entity_id).update(values)
+    db.commit()
+
+    return response_schema.from_orm(db.query(model).filter(model.id == entity_id).first())
+
+
+def update_after(db, model, response_schema, options, entity_id, values):
+    updated = response_schema.from_orm(update_by_id_db(db, model, entity_id, values, LookupError, options))
+    db.commit()
+
+    return updated
+
+
+class RoundTripCounter:
+    """
+    Count statements and commits sent to the database, optionally sleeping for each one to simulate network latency.
+    """
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.count = 0
+
+    def round_trip(self, *args):
+        self.count += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def __enter__(self):
+        event.listen(engine, 'before_cursor_execute', self.round_trip)
+        event.listen(engine, 'commit', self.round_trip)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(engine, 'before_cursor_execute', self.round_trip)
+        event.remove(engine, 'commit', self.round_trip)
+
+
+def run(handler, entity: str, updates: int, latency: float) -> dict:
+    model, request_schema, response_schema, options = ENTITIES[entity]
+
+    with SessionLocal() as db:
+        row = db.query(model).order_by(model.id).first()
+        if row is None:
+            raise SystemExit(f"There are no {entity} rows to update. Load a dataset with benchmarks.dataset first.")
+        entity_id = row.id
+        values = request_schema(**{field: getattr(row, field) for field in request_schema.__fields__}).dict()
+
+    latencies = []
+    with RoundTripCounter(latency) as counter:
+        for _ in range(updates):
+            with SessionLocal() as db:
+                start = time.perf_counter()
+                handler(db, model, response_schema, options, entity_id, values)
+                latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    return {
+        'round_trips': counter.count / updates,
+        'p50_ms': statistics.median(latencies) * 1000,
+        'p95_ms': latencies[int(len(latencies) * 0.95) - 1] * 1000,
+    }
+
+
+def main(args):
+    latency = args.round_trip_latency_ms / 1000
+
+    print(f"{args.updates} updates per entity, {args.round_trip_latency_ms}ms simulated round trip latency")
+    print(f"{'':20}{'round trips':>24}{'p50 ms':>24}{'p95 ms':>24}")
+    print(f"{'':20}{'before':>12}{'after':>12}{'before':>12}{'after':>12}{'before':>12}{'after':>12}")
+    for entity in ENTITIES:
+        # Warm up the connection pool and statement caches
+        run(update_before, entity, 5, 0)
+        run(update_after, entity, 5, 0)
+
+        before = run(update_before, entity, args.updates, latency)
+        after = run(update_after, entity, args.updates, latency)
+        print(f"{entity:20}{before['round_trips']:>12.0f}{after['round_trips']:>12.0f}"
+              f"{before['p50_ms']:>12.2f}{after['p50_ms']:>12.2f}{before['p95_ms']:>12.2f}{after['p95_ms']:>12.2f}")
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--updates', type=int, default=200)
+    parser.add_argument('--round-trip-latency-ms', type=float, default=1)
+    main(parser.parse_args())
@@ -0,0 +1,58 @@
+"""
+Gunicorn configuration for production. Used by startup.sh unless DEV_MODE is enabled:
+    gunicorn src.main:app -c gunicorn_conf.py
+
+Settings are read from environment variables:
+    HOST, PORT            Address to bind (default 0.0.0.0:5001)
+    WEB_CONCURRENCY       Number of worker processes. Defaults to WORKERS_PER_CORE * CPU count, with a minimum of 2
+                          and a maximum of MAX_WORKERS (if set)
+    KEEP_ALIVE            Seconds to keep idle client connections open (default 5). Must be longer than the idle timeout
+                          of any load balancer in front of the server.
+    GRACEFUL_TIMEOUT      Seconds workers are given to finish in-flight requests when restarting (default 30)
+    TIMEOUT               Seconds of silence before a worker is killed and restarted (default 60)
+    LOG_LEVEL             Gunicorn log level (default info)
+    ACCESS_LOG            Access log destination, such as - for stdout (default disabled, since every request is
+                          already logged by the dashboard.sql logger)
+"""
+import multiprocessing
+import os
+import tempfile
+
+workers_per_core = float(os.getenv('WORKERS_PER_CORE', '1'))
+default_workers = max(int(workers_per_core * multiprocessing.cpu_count()), 2)
+if os.getenv('MAX_WORKERS'):
+    default_workers = min(default_workers, int(os.getenv('MAX_WORKERS')))
+
+bind = f"{os.getenv('HOST', '0.0.0.0')}:{os.getenv('PORT', '5001')}"
+workers = int(os.getenv('WEB_CONCURRENCY', default_workers))
+
+# UvicornWorker uses uvloop and httptools when they are installed, and falls back to asyncio and h11 otherwise
+worker_class = 'uvicorn.workers.UvicornWorker'
+
+# Import the application once in the master process, so that workers start quickly and share memory. The startup
+# hooks (role seeding, cache invalidation listener) still run in each worker.
+preload_app = True
+
+keepalive = int(os.getenv('KEEP_ALIVE', '5'))
+graceful_timeout = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+timeout = int(os.getenv('TIMEOUT', '60'))
+
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+accesslog = os.getenv('ACCESS_LOG') or None
+errorlog = '-'
+
+# Workers record metrics in files in this directory, so that /metrics can report totals across workers. It must be set
+# before the application is imported, and is recreated on every start so that files from dead processes are dropped.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', tempfile.mkdtemp(prefix='dashboard-metrics-'))
+
+
+def when_ready(server):
+    # Importing the application may have opened pooled database connections in the master process. Close them, so
+    # that forked workers do not share their sockets.
+    from src.utility.database.database import engine
+    engine.dispose()
+
+
+def child_exit(server, worker):
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
@@ -1,21 +1,51 @@
+import time
+
+IMPORT_STARTED = time.perf_counter()  # Taken before importing the routers and models, to report the import time
+
+import asyncio
+import logging
+
 from fastapi import FastAPI
+from sqlalchemy.dialects.postgresql import insert
 from starlette import status
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
+from src.routers.admin import admin_router, profiling_authorized
 from src.routers.auth import auth_router
 from src.routers.mentorship_requests import mentorship_request_router
 from src.routers.prizes import prize_router
 from src.routers.projects import project_router
 from src.routers.roles import role_router
+from src.utility.catalog_cache import role_catalog
 from src.utility.database import models
-from src.utility.database.database import engine, get_db
+from src.utility.database.database import engine, async_engine, SessionLocal
+from src.utility.database.pool import log_pool_status
+from src.utility.database.schema import ensure_schema
+from src.utility.invalidation import listen_for_invalidations, publish_invalidation
+from src.utility.mentorship_stream import mentorship_request_broadcaster
+from src.utility.metrics import exceptions_handled, metrics_response
+from src.utility.middleware import QueryStatsMiddleware, MetricsMiddleware
+from src.utility.password_hashing import password_hasher, shutdown_import_executor, PASSWORD_HASH_RETRY_AFTER_SECONDS
+from src.utility.profiling import ProfilingMiddleware, profile_buffer
 from src.utility.responses import CredentialException, PrizeNotFoundException, ProjectNotFoundException, \
-    RoleNotFoundException, UserNotFoundException, MentorshipRequestNotFoundException
+    RoleNotFoundException, UserNotFoundException, MentorshipRequestNotFoundException, PasswordHashingBusyException, \
+    InvalidCursorException, PrizeNotSelectableException
 from src.utility.schemas.Role import RoleCreate
+from src.utility.settings import settings
+
+logger = logging.getLogger('dashboard')
+if not logger.handlers:
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter('%(levelname)s:     [%(name)s] %(message)s'))
+    logger.addHandler(handler)
+    logger.setLevel(settings.log_level)
+    logger.propagate = False
 
-models.Base.metadata.create_all(bind=engine)
 app = FastAPI()
+app.add_middleware(ProfilingMiddleware, authorize=profiling_authorized, buffer=profile_buffer)
+app.add_middleware(QueryStatsMiddleware, repeat_threshold=settings.n_plus_one_threshold if settings.dev_mode else 0)
+app.add_middleware(MetricsMiddleware)
 
 app.include_router(
     auth_router,
@@ -55,12 +85,26 @@ app.include_router(
     responses={404: {"detail": "Not found"}},
 )
 
+app.include_router(
+    admin_router,
+    prefix="/admin",
+    tags=["admin"],
+    responses={404: {"detail": "Not found"}},
+)
+
+app.state.startup_timings = {'import_ms': (time.perf_counter() - IMPORT_STARTED) * 1000}
+
 
 @app.on_event('startup')
 def application_startup():
-    db = next(get_db())  # Get db instance from generator
+    timings = app.state.startup_timings
 
-    # Generate admin role if it does not already exist.
+    # Create the tables, unless the database has already been migrated to the latest revision
+    start = time.perf_counter()
+    created_tables = ensure_schema(engine)
+    timings['schema_ms'] = (time.perf_counter() - start) * 1000
+
+    # Generate default roles if they do not already exist.
 
     roles = [
         {
@@ -78,13 +122,59 @@ def application_startup():
         }
     ]
 
-    for role in roles:
-        role_exists = db.query(models.RoleModel).filter(models.RoleModel.name == role['name']).first()
-        if not role_exists:
-            new_role = RoleCreate(**role)
-            new_role = models.RoleModel(**new_role.dict())
-            db.add(new_role)
-            db.commit()
+    start = time.perf_counter()
+    with SessionLocal() as db:
+        created_roles = db.execute(
+            insert(models.RoleModel)
+            .values([RoleCreate(**role).dict() for role in roles])
+            .on_conflict_do_nothing(index_elements=[models.RoleModel.name])
+            .returning(models.RoleModel.id)
+        ).scalars().all()
+        for role_id in created_roles:
+            publish_invalidation(db, 'role', role_id)
+        db.commit()
+    if created_roles:
+        role_catalog.bump()
+    timings['role_seeding_ms'] = (time.perf_counter() - start) * 1000
+
+    logger.info("Startup took %.0fms: import=%.0fms schema=%.0fms (create_all %s) role_seeding=%.0fms",
+                sum(timings.values()), timings['import_ms'], timings['schema_ms'],
+                'ran' if created_tables else 'skipped', timings['role_seeding_ms'])
+
+
+@app.on_event('startup')
+async def start_background_tasks():
+    if settings.db_pool_stats_log_interval_seconds > 0:
+        app.state.pool_status_logger = asyncio.create_task(log_pool_status(
+            {'sync': engine, 'async': async_engine.sync_engine},
+            settings.db_pool_stats_log_interval_seconds
+        ))
+    if settings.cache_invalidation_listener:
+        app.state.invalidation_listener = asyncio.create_task(listen_for_invalidations(settings.postgres_dsn))
+        app.state.mentorship_request_broadcaster = asyncio.create_task(mentorship_request_broadcaster.run())
+
+
+@app.on_event('shutdown')
+async def stop_background_tasks():
+    for task in ('pool_status_logger', 'invalidation_listener', 'mentorship_request_broadcaster'):
+        if getattr(app.state, task, None):
+            getattr(app.state, task).cancel()
+    # Close the async pool's connections, which belong to this event loop and cannot be used from another
+    await async_engine.dispose()
+
+
+@app.on_event('shutdown')
+def application_shutdown():
+    password_hasher.shutdown()
+    shutdown_import_executor()
+
+
+@app.get('/metrics', include_in_schema=False)
+def metrics():
+    """
+    Prometheus metrics for request latency, database pool usage, password hashing, caches and handled exceptions.
+    """
+    return metrics_response()
 
 
 @app.exception_handler(CredentialException)
@@ -98,6 +188,7 @@ async def credential_exception_handler(request: Request, exc: CredentialExceptio
     :param exc: Exception
     :return: 401 HTTP Exception with authentication failure message
     """
+    exceptions_handled.labels(type(exc).__name__).inc()
     return JSONResponse(
         status_code=status.HTTP_401_UNAUTHORIZED,
         content={
@@ -110,6 +201,7 @@ async def credential_exception_handler(request: Request, exc: CredentialExceptio
 
 @app.exception_handler(PrizeNotFoundException)
 async def prize_exception_handler(request: Request, exc: PrizeNotFoundException):
+    exceptions_handled.labels(type(exc).__name__).inc()
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content={
@@ -118,8 +210,20 @@ async def prize_exception_handler(request: Request, exc: PrizeNotFoundException)
     )
 
 
+@app.exception_handler(PrizeNotSelectableException)
+async def prize_not_selectable_exception_handler(request: Request, exc: PrizeNotSelectableException):
+    exceptions_handled.labels(type(exc).__name__).inc()
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={
+            "detail": "One or more of the given prizes cannot be selected by projects."
+        },
+    )
+
+
 @app.exception_handler(ProjectNotFoundException)
 async def project_exception_handler(request: Request, exc: ProjectNotFoundException):
+    exceptions_handled.labels(type(exc).__name__).inc()
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content={
@@ -130,6 +234,7 @@ async def project_exception_handler(request: Request, exc: ProjectNotFoundExcept
 
 @app.exception_handler(RoleNotFoundException)
 async def project_exception_handler(request: Request, exc: RoleNotFoundException):
+    exceptions_handled.labels(type(exc).__name__).inc()
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content={
@@ -140,6 +245,7 @@ async def project_exception_handler(request: Request, exc: RoleNotFoundException
 
 @app.exception_handler(UserNotFoundException)
 async def project_exception_handler(request: Request, exc: UserNotFoundException):
+    exceptions_handled.labels(type(exc).__name__).inc()
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content={
@@ -150,6 +256,7 @@ async def project_exception_handler(request: Request, exc: UserNotFoundException
 
 @app.exception_handler(MentorshipRequestNotFoundException)
 async def project_exception_handler(request: Request, exc: MentorshipRequestNotFoundException):
+    exceptions_handled.labels(type(exc).__name__).inc()
     return JSONResponse(
         status_code=status.HTTP_404_NOT_FOUND,
         content={
@@ -158,6 +265,32 @@ async def project_exception_handler(request: Request, exc: MentorshipRequestNotF
     )
 
 
+@app.exception_handler(PasswordHashingBusyException)
+async def password_hashing_busy_exception_handler(request: Request, exc: PasswordHashingBusyException):
+    """
+    Handler for when the password hashing queue is full, such as during a login storm. The client should retry after
+    the given delay.
+    """
+    exceptions_handled.labels(type(exc).__name__).inc()
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={
+            "detail": "The server is handling too many logins right now. Please try again shortly."
+        },
+        headers={"Retry-After": str(PASSWORD_HASH_RETRY_AFTER_SECONDS)},
+    )
+
+
+@app.exception_handler(InvalidCursorException)
+async def invalid_cursor_exception_handler(request: Request, exc: InvalidCursorException):
+    exceptions_handled.labels(type(exc).__name__).inc()
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={
+            "detail": "Invalid pagination cursor. Use the next_cursor value returned by the previous page."
+        },
+    )
+
 
 @app.get("/")
 async def root():
@@ -0,0 +1,134 @@
+import os
+
+from fastapi import APIRouter, Depends, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.security.utils import get_authorization_scheme_param
+from starlette.requests import Request
+from starlette.responses import HTMLResponse, JSONResponse, PlainTextResponse
+
+from src.routers.auth import current_user_admin, get_current_user
+from src.utility.catalog_cache import prize_catalog, role_catalog
+from src.utility.database.database import engine, async_engine, SessionLocal
+from src.utility.database.pool import pool_status
+from src.utility.profiling import profile_buffer, render_profile, summarize_profile
+from src.utility.responses import CredentialException
+
+admin_router = APIRouter()
+
+
+# -------------------------------------------------------------------------------
+#
+#           Operational Statistics
+#
+#           Each worker process has its own pools and caches, so these
+#           endpoints report on whichever worker handles the request.
+#
+# -------------------------------------------------------------------------------
+
+
+@admin_router.get("/database_pool", dependencies=[Depends(current_user_admin)])
+def get_database_pool_status():
+    """
+    Report connection pool usage for this worker's sync and async engines.
+
+    :return: Checked out, idle and overflow connection counts, and checkout wait times, for each engine
+    """
+
+    return {
+        'pid': os.getpid(),
+        'sync': pool_status(engine),
+        'async': pool_status(async_engine.sync_engine),
+    }
+
+
+@admin_router.get("/startup", dependencies=[Depends(current_user_admin)])
+def get_startup_timings(request: Request):
+    """
+    Report how long this worker took to start, broken down by phase.
+    """
+
+    return {
+        'pid': os.getpid(),
+        **request.app.state.startup_timings,
+    }
+
+
+@admin_router.get("/catalog_cache", dependencies=[Depends(current_user_admin)])
+def get_catalog_cache_stats():
+    """
+    Report the version and hit rate of this worker's prize and role catalog caches.
+    """
+
+    return {
+        'pid': os.getpid(),
+        'prizes': prize_catalog.stats(),
+        'roles': role_catalog.stats(),
+    }
+
+
+# -------------------------------------------------------------------------------
+#
+#           Request Profiling
+#
+#           Admins can profile any request by sending it with an
+#           X-Profile header or a profile=1 query parameter, then
+#           download the result using the returned X-Profile-Id.
+#
+# -------------------------------------------------------------------------------
+
+
+async def profiling_authorized(request: Request) -> bool:
+    """
+    Check that a request asking to be profiled was sent by an admin, using the same checks as current_user_admin.
+
+    :param request: Request to be profiled
+    :return: True if the request may be profiled
+    """
+    scheme, token = get_authorization_scheme_param(request.headers.get('authorization'))
+    if scheme.lower() != 'bearer' or not token:
+        return False
+
+    db = SessionLocal()
+    try:
+        current_user_admin(await run_in_threadpool(get_current_user, token, db))
+    except CredentialException:
+        return False
+    finally:
+        db.close()
+
+    return True
+
+
+@admin_router.get("/profiles", dependencies=[Depends(current_user_admin)])
+def list_profiles():
+    """
+    List the profiles captured by this worker, most recent first.
+    """
+
+    return {
+        'pid': os.getpid(),
+        'profiles': profile_buffer.list(),
+    }
+
+
+@admin_router.get("/profiles/{profile_id}", dependencies=[Depends(current_user_admin)])
+def download_profile(profile_id: str, output: str = 'html'):
+    """
+    Download a captured profile, as an interactive HTML call tree, as text, or as JSON with the SQL timeline.
+
+    :param profile_id: Id from the X-Profile-Id header of the profiled response
+    :param output: html, text or json
+    """
+    profile = profile_buffer.get(profile_id)
+    if profile is None:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"detail": "Profile not found. It may have been captured by another worker, or discarded."},
+        )
+
+    if output == 'json':
+        return {**summarize_profile(profile), 'sql_timeline': profile['sql_timeline']}
+    if output == 'text':
+        return PlainTextResponse(render_profile(profile, 'text'))
+
+    return HTMLResponse(render_profile(profile, 'html'))
@@ -7,14 +7,23 @@ from sqlalchemy.orm import Session
 from starlette import status
 
 
-from fastapi import APIRouter, Depends, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 
 from src.utility.database import models
-from src.utility.database_wrappers import get_user_by_email_db, create_user_db
-from src.utility.responses import CredentialException
+from src.utility.bulk_import import spool_request_body, import_users_ndjson
+from src.utility.cache import TTLCache
+from src.utility.database.loaders import user_load_options, user_role_load_options
+from src.utility.invalidation import register_invalidation_handler, publish_invalidation
+from src.utility.database_wrappers import get_user_by_email_db, create_user_db, get_principal_by_email_db, \
+    get_user_by_id_db, get_token_version_db
+from src.utility.password_hashing import pwd_context, password_hasher, password_needs_rehash
+from src.utility.responses import CredentialException, UserNotFoundException, PasswordHashingBusyException, \
+    RoleNotFoundException
 from src.utility.database.database import get_db
 from src.utility.schemas.User import UserCreate, User
+from src.utility.settings import settings
 
 auth_router = APIRouter()
 
@@ -23,12 +32,20 @@ SECRET_KEY = "22013516088ae490602230e8096e61b86762f60ba48a535f0f0e2af32e87decd"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60*16  # 16 Hour Expiration
 
+# Authenticated principals are cached in-process so that protected endpoints do not query the database every request
+PRINCIPAL_CACHE_SIZE = settings.principal_cache_size
+PRINCIPAL_CACHE_TTL_SECONDS = settings.principal_cache_ttl_seconds
+
+# When enabled, the user's id, role and disabled status are signed into the access token so that role checks can be
+# performed without loading the user. Tokens are revoked by bumping the user's token version.
+TOKEN_ROLE_CLAIMS_ENABLED = settings.token_role_claims
+TOKEN_VERSION_CACHE_SIZE = settings.token_version_cache_size
+TOKEN_VERSION_CACHE_TTL_SECONDS = settings.token_version_cache_ttl_seconds
+
 from fastapi.security import OAuth2PasswordBearer
-from pydantic import BaseModel
-from passlib.context import CryptContext
+from pydantic import BaseModel, ValidationError
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
 class Token(BaseModel):
@@ -42,6 +59,31 @@ class Token(BaseModel):
 class AuthTokenModel(BaseModel):
     email: str
 
+    # Signed claims, only present on tokens issued with TOKEN_ROLE_CLAIMS_ENABLED
+    id: Optional[int] = None
+    role: Optional[str] = None
+    disabled: bool = False
+    ver: Optional[int] = None
+
+
+class Principal(BaseModel):
+    """
+    Minimal identity of the currently authenticated user, holding only what is needed for authorization checks.
+    Endpoints that need the rest of the user's data should load it from the database using the id.
+    """
+    id: int
+    email: str
+    role: Optional[str] = None
+    disabled: bool = False
+
+    class Config:
+        allow_mutation = False
+
+
+principal_cache = TTLCache(maxsize=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL_SECONDS, name='principal')
+token_version_cache = TTLCache(maxsize=TOKEN_VERSION_CACHE_SIZE, ttl=TOKEN_VERSION_CACHE_TTL_SECONDS,
+                               name='token_version')
+
 
 # -------------------------------------------------------------------------------
 #
@@ -62,12 +104,29 @@ def get_password_hash(password):
     return pwd_context.hash(password)
 
 
-def authenticate_user(email: str, password: str, db):
-    user = get_user_by_email_db(db, email)
+async def authenticate_user(email: str, password: str, db):
+    """
+    Check a user's credentials. Password verification runs on the dedicated password hashing executor, and if the
+    stored hash was created with a different bcrypt cost than the one configured, it is transparently rehashed.
+
+    :param email: User's email address
+    :param password: Plaintext password to check
+    :param db: Database session
+    :return: User if credentials are valid, else False
+    """
+    user = await run_in_threadpool(get_user_by_email_db, db, email, user_role_load_options)
     if not user:
         return False
-    if not verify_password(password, user.password):
+    if not await password_hasher.verify(password, user.password):
         return False
+
+    if password_needs_rehash(user.password):
+        try:
+            user.password = await password_hasher.hash(password)
+            await run_in_threadpool(db.commit)
+        except PasswordHashingBusyException:
+            pass  # The rehash will be retried on the user's next login
+
     return user
 
 
@@ -82,22 +141,99 @@ def create_access_token(data: dict, expires_delta: Optional[datetime.timedelta]
     return encoded_jwt
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+def create_user_access_token(user: models.UserModel, expires_delta: Optional[datetime.timedelta] = None):
+    """
+    Issue an access token for a user. If role claims are enabled, the token also carries the user's id, role name,
+    disabled status and current token version.
+
+    :param user: User to issue the token for
+    :param expires_delta: Time until the token expires
+    :return: Encoded JWT
+    """
+    data = {"email": user.email}
+    if TOKEN_ROLE_CLAIMS_ENABLED:
+        data.update({
+            "id": user.id,
+            "role": user.role.name if user.role else None,
+            "disabled": bool(user.disabled),
+            "ver": user.token_version,
+        })
+
+    return create_access_token(data=data, expires_delta=expires_delta)
+
+
+def revoke_user_tokens(user_id: int, email: str):
+    """
+    Remove a user from the principal and token version caches. This must be called after a change is made to a
+    user's role or disabled status (and their token_version has been incremented) so that the change takes effect
+    on their next request.
+
+    :param user_id: Id of the user whose permissions have changed
+    :param email: Email address of the user whose permissions have changed
+    """
+    principal_cache.invalidate(email)
+    token_version_cache.invalidate(user_id)
+
+
+def evict_user(user_id: Optional[str]):
+    """
+    Handle a user invalidation published by another worker, where only the user's id is known.
+    """
+    if user_id is None:
+        evict_all_users()
+        return
+
+    principal_cache.invalidate_where(lambda email, principal: principal.id == int(user_id))
+    token_version_cache.invalidate(int(user_id))
+
+
+def evict_all_users(role_id: Optional[str] = None):
+    principal_cache.clear()
+    token_version_cache.clear()
+
+
+register_invalidation_handler('user', evict_user)
+register_invalidation_handler('role', evict_all_users)
+
+
+def get_token_version(user_id: int, db: Session):
+    version = token_version_cache.get(user_id)
+    if version is None:
+        version = get_token_version_db(db, user_id)
+        if version is not None:
+            token_version_cache.set(user_id, version)
+
+    return version
+
+
+def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> Principal:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        email: str = payload.get("email")
-        if email is None:
+        if payload.get("email") is None:
             raise CredentialException()
-        token_data = AuthTokenModel(email=email)
-    except JWTError:
+        token_data = AuthTokenModel(**payload)
+    except (JWTError, ValidationError):
         raise CredentialException()
-    user = get_user_by_email_db(db, email=token_data.email)
-    if user is None:
-        raise CredentialException()
-    return user
 
+    # Tokens carrying signed claims are authorized without loading the user, provided they have not been revoked
+    if token_data.ver is not None and token_data.id is not None:
+        if get_token_version(token_data.id, db) != token_data.ver:
+            raise CredentialException()
+        return Principal(id=token_data.id, email=token_data.email, role=token_data.role,
+                         disabled=token_data.disabled)
+
+    principal = principal_cache.get(token_data.email)
+    if principal is None:
+        user = get_principal_by_email_db(db, email=token_data.email)
+        if user is None:
+            raise CredentialException()
+        principal = Principal(id=user.id, email=user.email, role=user.role, disabled=bool(user.disabled))
+        principal_cache.set(principal.email, principal)
 
-def get_current_active_user(current_user=Depends(get_current_user)):
+    return principal
+
+
+def get_current_active_user(current_user: Principal = Depends(get_current_user)):
     if current_user.disabled:
         raise CredentialException()
 
@@ -110,37 +246,37 @@ def get_current_active_user(current_user=Depends(get_current_user)):
 #
 # -------------------------------------------------------------------------------
 
-def current_user_admin(current_user: User = Depends(get_current_user)):
+def current_user_admin(current_user: Principal = Depends(get_current_user)):
     return current_user_role(['admin'], current_user)
 
 
-def current_user_organizer(current_user: User = Depends(get_current_user)):
+def current_user_organizer(current_user: Principal = Depends(get_current_user)):
     return current_user_role(['admin', 'organizer'], current_user)
 
 
-def current_user_participant(current_user: User = Depends(get_current_user)):
+def current_user_participant(current_user: Principal = Depends(get_current_user)):
     return current_user_role(['admin', 'organizer', 'participant'], current_user)
 
 
-def current_user_role(roles: List[str], current_user: User = Depends(get_current_user)):
+def current_user_role(roles: List[str], current_user: Principal = Depends(get_current_user)):
     """
     Permission Checking Function to be used as a Dependency for API endpoints. This is used as a helper.
-    This will either return a User object to the calling method if the user meets the authentication requirements,
-    or it will raise a CredentialException and prevent the method that depends on this from continuing.
+    This will either return a Principal object to the calling method if the user meets the authentication
+    requirements, or it will raise a CredentialException and prevent the method that depends on this from continuing.
 
     :param roles: List of Role names that will have permission granted
     :param current_user: Current User
-    :return: User object if user has correct role, else raise CredentialException
+    :return: Principal object if user has correct role, else raise CredentialException
     """
 
-    if not current_user.role or current_user.role.name not in roles:
+    if not current_user.role or current_user.role not in roles:
         raise CredentialException()
 
     return current_user
 
 
 @auth_router.post("/login")
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     Logs current user in by validating their credentials and then issuing a new OAuth2 bearer token. This token
     is only valid for a fixed amount of time (ACCESS_TOKEN_EXPIRE_MINUTES) and after this has passed the user
@@ -150,7 +286,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     :param db: Database parameter, filled by FastAPI automatically
     :return: {'status': 'success'} with OAuth2 bearer token if login successful, else HTTPException
     """
-    user = authenticate_user(form_data.username, form_data.password, db)
+    user = await authenticate_user(form_data.username, form_data.password, db)
 
     if not user:
         raise HTTPException(
@@ -160,9 +296,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
         )
 
     access_token_expires = datetime.timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
-    access_token = create_access_token(
-        data={"email": form_data.username}, expires_delta=access_token_expires
-    )
+    access_token = await run_in_threadpool(create_user_access_token, user, access_token_expires)
     return {
         'detail': 'Successfully Logged In.',
         "access_token": access_token,
@@ -171,7 +305,7 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
 
 
 @auth_router.post('/new', response_model=User)
-def create_account(user: UserCreate, db: Session = Depends(get_db)):
+async def create_account(user: UserCreate, db: Session = Depends(get_db)):
     """
     Creates a new user account with specified information. No permissions are granted upon account creation
     and an administrator must manually add permissions to an account before it is able to access most endpoints.
@@ -181,10 +315,7 @@ def create_account(user: UserCreate, db: Session = Depends(get_db)):
     :return Success if user account added, otherwise failure message and status code
     """
 
-    # Hash Password Before Storing in Database
-    user.password = get_password_hash(user.password)
-
-    if db.query(models.UserModel).filter(models.UserModel.email == user.email).first():
+    if await run_in_threadpool(get_user_by_email_db, db, user.email):
         return JSONResponse(
             status_code=400,
             content={
@@ -193,7 +324,39 @@ def create_account(user: UserCreate, db: Session = Depends(get_db)):
             }
         )
 
-    return create_user_db(db, user)
+    # Hash Password Before Storing in Database
+    user.password = await password_hasher.hash(user.password)
+
+    new_user = await run_in_threadpool(create_user_db, db, user)
+    return await run_in_threadpool(get_user_by_id_db, db, new_user.id, user_load_options)
+
+
+@auth_router.post('/import', dependencies=[Depends(current_user_admin)])
+async def import_accounts(request: Request, role: str = 'participant', db: Session = Depends(get_db)):
+    """
+    Bulk create user accounts from a CSV (Content-Type: text/csv, with an email,first_name,last_name,password header)
+    or NDJSON (one JSON object per line) request body. Every imported user is given the specified role, and accounts
+    whose email address already exists are skipped.
+
+    :param request: HTTP Request, whose body contains the accounts to import
+    :param role: Name of the role to assign to imported users
+    :param db: Database parameter, filled by FastAPI automatically
+    :return: NDJSON stream with one result per row, followed by a summary line
+    """
+
+    role_model = await run_in_threadpool(
+        lambda: db.query(models.RoleModel).filter(models.RoleModel.name == role).first()
+    )
+    if role_model is None:
+        raise RoleNotFoundException()
+
+    upload = await spool_request_body(request)
+    content_type = request.headers.get('content-type', '')
+
+    return StreamingResponse(
+        import_users_ndjson(upload, content_type, role_model.id, db),
+        media_type='application/x-ndjson'
+    )
 
 
 @auth_router.get("/status", dependencies=[Depends(get_current_active_user)])
@@ -208,15 +371,21 @@ def get_login_status():
 
 
 @auth_router.get("/profile", response_model=User)
-def get_current_user_profile(current_user: User = Depends(get_current_active_user)):
+def get_current_user_profile(current_user: Principal = Depends(get_current_active_user),
+                             db: Session = Depends(get_db)):
     """
     Export the data of the current user to the client.
 
     :param current_user: Currently logged in user to have data exported. This field is auto filled by the HTTP request
+    :param db: Database parameter, filled by FastAPI automatically
     :return: User profile details, excluding hashed password.
     """
 
-    return current_user
+    user = get_user_by_id_db(db, current_user.id, user_load_options)
+    if user is None:
+        raise CredentialException()
+
+    return user
 
 
 # -------------------------------------------------------------------------------
@@ -251,4 +420,55 @@ def create_admin_account_testing(db: Session = Depends(get_db)):
             'username': 'admin@email.com',
             'password': 'testpass'
         }
-    }
\ No newline at end of file
+    }
+
+
+def set_user_disabled(user_id: int, disabled: bool, db: Session):
+    user = get_user_by_id_db(db, user_id)
+    if not user:
+        raise UserNotFoundException()
+
+    user.disabled = disabled
+    user.token_version = models.UserModel.token_version + 1
+    publish_invalidation(db, 'user', user_id)
+    db.commit()
+
+    user = get_user_by_id_db(db, user_id, user_load_options)
+    revoke_user_tokens(user.id, user.email)
+
+    return user
+
+
+@auth_router.post('/{user_id}/disable', response_model=User, dependencies=[Depends(current_user_admin)])
+def disable_user(user_id: int, db: Session = Depends(get_db)):
+    return set_user_disabled(user_id, True, db)
+
+
+@auth_router.post('/{user_id}/enable', response_model=User, dependencies=[Depends(current_user_admin)])
+def enable_user(user_id: int, db: Session = Depends(get_db)):
+    return set_user_disabled(user_id, False, db)
+
+
+@auth_router.get('/principal_cache', dependencies=[Depends(current_user_admin)])
+def get_principal_cache_stats():
+    """
+    Report the hit and miss counters of this worker's principal and token version caches.
+
+    :return: Cache statistics
+    """
+
+    return {
+        'principal': principal_cache.stats(),
+        'token_version': token_version_cache.stats(),
+    }
+
+
+@auth_router.get('/password_hashing', dependencies=[Depends(current_user_admin)])
+def get_password_hashing_stats():
+    """
+    Report the queue depth, rejections and hashing latency of this worker's password hashing executor.
+
+    :return: Password hashing statistics
+    """
+
+    return password_hasher.stats()
\ No newline at end of file
@@ -1,27 +1,39 @@
-from typing import List
+from typing import Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Header
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
+from starlette.responses import StreamingResponse
 
-from src.routers.auth import current_user_admin, current_user_participant, current_user_organizer
+from src.routers.auth import current_user_participant, current_user_organizer, Principal
 from src.utility.database import models
-from src.utility.database.database import get_db
-from src.utility.responses import MentorshipRequestNotFoundException, UserNotFoundException, CredentialException, \
-    PrizeNotFoundException
+from src.utility.database.database import get_db, get_async_db
+from src.utility.database_wrappers import claim_next_mentorship_request_db
+from src.utility.mentorship_stream import mentorship_request_broadcaster, publish_mentorship_request_change, \
+    publish_mentorship_request_change_async
+from src.utility.pagination import PageParams, page_params, paginate
+from src.utility.repository import update_by_id_db, owner_scope
+from src.utility.responses import MentorshipRequestNotFoundException
 from src.utility.schemas.MentorshipRequest import MentorshipRequestCreate
 from src.utility.schemas.MentorshipRequest import MentorshipRequest
-from src.utility.schemas.User import User
+from src.utility.schemas.Page import Page
 
 mentorship_request_router = APIRouter()
 
 
-def load_mentorship_request_from_id(mentorship_request_id: int, db: Session = Depends(get_db)):
-    mentorship_request = db.query(models.MentorshipRequestModel).filter(
-        models.MentorshipRequestModel.id == mentorship_request_id).first()
+async def load_mentorship_request_from_id_async(mentorship_request_id: int,
+                                                current_user: Principal = Depends(current_user_participant),
+                                                db: AsyncSession = Depends(get_async_db)):
+    # Participants can only load their own requests
+    scope = owner_scope(models.MentorshipRequestModel, current_user, MentorshipRequestNotFoundException)
+    mentorship_request = await db.scalar(
+        select(models.MentorshipRequestModel)
+        .where(models.MentorshipRequestModel.id == mentorship_request_id, scope.predicate)
+    )
 
     if mentorship_request is None:
-        raise MentorshipRequestNotFoundException
+        raise scope.not_found
 
     return mentorship_request
 
@@ -32,65 +44,93 @@ def load_mentorship_request_from_id(mentorship_request_id: int, db: Session = De
 #
 # -------------------------------------------------------------------------------
 
-@mentorship_request_router.get("/all", response_model=List[MentorshipRequest],
+@mentorship_request_router.get("/all", response_model=Page[MentorshipRequest],
                                dependencies=[Depends(current_user_organizer)])
 async def get_all_mentorship_requests(
-        db: Session = Depends(get_db),
+        resolved: Optional[bool] = None,
+        urgency: Optional[int] = None,
+        mentor_user_id: Optional[int] = None,
+        page: PageParams = Depends(page_params),
+        db: AsyncSession = Depends(get_async_db),
 ):
-    return db.query(models.MentorshipRequestModel).all()
+    statement = select(models.MentorshipRequestModel)
+    if resolved is not None:
+        statement = statement.where(models.MentorshipRequestModel.resolved == resolved)
+    if urgency is not None:
+        statement = statement.where(models.MentorshipRequestModel.urgency == urgency)
+    if mentor_user_id is not None:
+        statement = statement.where(models.MentorshipRequestModel.mentor_user_id == mentor_user_id)
 
+    return await paginate(db, statement, models.MentorshipRequestModel, page)
 
-@mentorship_request_router.get("/{mentorship_request_id}", response_model=MentorshipRequest)
-async def get_mentorship_request(current_user: User = Depends(current_user_participant),
-                                 mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id)):
-    all_user_requests = [request.id for request in current_user.mentorship_requests_participant]
-    if current_user.role.name == 'participant' and mentorship_request.id not in all_user_requests:
-        return CredentialException()
+
+@mentorship_request_router.post("/claim_next", response_model=MentorshipRequest)
+async def claim_next_mentorship_request(
+        current_user: Principal = Depends(current_user_organizer),
+        db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Assign the most urgent unresolved request without a mentor to the current user. Mentors can call this at the same
+    time without waiting on each other or being assigned the same request.
+    """
+    mentorship_request = await claim_next_mentorship_request_db(db, current_user.id)
+    if mentorship_request is None:
+        raise MentorshipRequestNotFoundException
+
+    await publish_mentorship_request_change_async(db, mentorship_request.id, 'claimed')
+    await db.commit()
 
     return mentorship_request
 
 
+@mentorship_request_router.get("/stream", dependencies=[Depends(current_user_organizer)])
+def stream_mentorship_requests(last_event_id: Optional[str] = Header(None), db: Session = Depends(get_db)):
+    """
+    Server-sent events for the mentor and organizer views, instead of polling /all. The first event is a snapshot of
+    the unresolved requests, followed by created, updated, claimed, resolved and deleted events as requests change.
+    A reconnecting client sends the Last-Event-ID header, and is sent the events it missed if this worker still has
+    them, or a new snapshot otherwise.
+    """
+    # Release the connection used to authorize the request, rather than holding it for as long as the client listens
+    db.close()
+
+    return StreamingResponse(mentorship_request_broadcaster.stream(last_event_id), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@mentorship_request_router.get("/{mentorship_request_id}", response_model=MentorshipRequest)
+async def get_mentorship_request(
+        mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id_async)
+):
+    return mentorship_request
+
+
 @mentorship_request_router.post("/new", response_model=MentorshipRequest, status_code=201)
 def create_mentorship_request(
         mentorship_request: MentorshipRequestCreate,
-        current_user: User = Depends(current_user_participant),
+        current_user: Principal = Depends(current_user_participant),
         db: Session = Depends(get_db)
 ):
-    u: User = db.query(models.UserModel).filter(models.UserModel.id == current_user.id).first()
-    if u.mentorship_request is not None:
-        return JSONResponse(
-            status_code=status.HTTP_409_CONFLICT,
-            content={
-                "detail": "You are already assigned to a mentorship_request. Please delete the mentorship_request or leave the mentorship_request "
-                          "team if you wish to create a new one."
-            },
-        )
-
-    new_mentorship_request = models.MentorshipRequestModel(**mentorship_request.dict())
+    new_mentorship_request = models.MentorshipRequestModel(**mentorship_request.dict(),
+                                                            participant_user_id=current_user.id)
     db.add(new_mentorship_request)
+    db.flush()
+    publish_mentorship_request_change(db, new_mentorship_request.id, 'created')
     db.commit()
     db.refresh(new_mentorship_request)
 
-    # Assign new mentorship_request to user
-    db.query(models.UserModel).filter(models.UserModel.id == current_user.id).update(
-        {'mentorship_request_id': new_mentorship_request.id})
-    db.commit()
-
     return new_mentorship_request
 
 
 @mentorship_request_router.delete("/{mentorship_request_id}")
 async def delete_mentorship_request(
         mentorship_request_id: int,
-        mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id),
-        current_user: User = Depends(current_user_participant),
-        db: Session = Depends(get_db)
+        mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    if current_user.role.name == 'participant' and mentorship_request.participant_user_id != current_user.id:
-        return CredentialException()
-
-    db.delete(mentorship_request)
-    db.commit()
+    await db.delete(mentorship_request)
+    await publish_mentorship_request_change_async(db, mentorship_request_id, 'deleted')
+    await db.commit()
 
     return {
         "detail": "MentorshipRequest successfully deleted.",
@@ -98,25 +138,22 @@ async def delete_mentorship_request(
     }
 
 
-@mentorship_request_router.put("/{mentorship_request_id}",
-                               dependencies=[Depends(load_mentorship_request_from_id)],
-                               response_model=MentorshipRequest
-                               )
+@mentorship_request_router.put("/{mentorship_request_id}", response_model=MentorshipRequest)
 def update_mentorship_request(
         mentorship_request_id: int,
         mentorship_request: MentorshipRequestCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(current_user_participant),
+        current_user: Principal = Depends(current_user_participant),
 ):
-    all_user_requests = [request.id for request in current_user.mentorship_requests_participant]
-    if current_user.role.name == 'participant' and mentorship_request_id not in all_user_requests:
-        return CredentialException()
-
-    db.query(models.MentorshipRequestModel).filter(models.MentorshipRequestModel.id == mentorship_request_id).update(
-        {**mentorship_request.dict()})
+    scope = owner_scope(models.MentorshipRequestModel, current_user, MentorshipRequestNotFoundException)
+    updated_mentorship_request = MentorshipRequest.from_orm(update_by_id_db(
+        db, models.MentorshipRequestModel, mentorship_request_id, mentorship_request.dict(), scope.not_found,
+        where=scope.predicate
+    ))
+    publish_mentorship_request_change(db, mentorship_request_id, 'updated')
     db.commit()
 
-    return load_mentorship_request_from_id(mentorship_request_id, db)
+    return updated_mentorship_request
 
 
 # -------------------------------------------------------------------------------
@@ -130,16 +167,17 @@ def update_mentorship_request(
                                 dependencies=[Depends(current_user_organizer)])
 async def add_participant_to_request(
         user_id: int,
-        mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id),
-        db: Session = Depends(get_db)
+        mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
     if mentorship_request is None:
         raise MentorshipRequestNotFoundException
 
     mentorship_request.participant_user_id = user_id
     db.add(mentorship_request)
-    db.commit()
-    db.refresh(mentorship_request)
+    await publish_mentorship_request_change_async(db, mentorship_request.id, 'updated')
+    await db.commit()
+    await db.refresh(mentorship_request)
 
     return mentorship_request
 
@@ -148,15 +186,31 @@ async def add_participant_to_request(
                                 dependencies=[Depends(current_user_organizer)])
 async def add_participant_to_request(
         user_id: int,
-        mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id),
-        db: Session = Depends(get_db)
+        mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
     if mentorship_request is None:
         raise MentorshipRequestNotFoundException
 
     mentorship_request.mentor_user_id = user_id
     db.add(mentorship_request)
-    db.commit()
-    db.refresh(mentorship_request)
+    await publish_mentorship_request_change_async(db, mentorship_request.id, 'claimed')
+    await db.commit()
+    await db.refresh(mentorship_request)
+
+    return mentorship_request
+
+
+@mentorship_request_router.post("/{mentorship_request_id}/resolve", response_model=MentorshipRequest,
+                                dependencies=[Depends(current_user_organizer)])
+async def resolve_mentorship_request(
+        mentorship_request: MentorshipRequest = Depends(load_mentorship_request_from_id_async),
+        db: AsyncSession = Depends(get_async_db)
+):
+    mentorship_request.resolved = True
+    db.add(mentorship_request)
+    await publish_mentorship_request_change_async(db, mentorship_request.id, 'resolved')
+    await db.commit()
+    await db.refresh(mentorship_request)
 
     return mentorship_request
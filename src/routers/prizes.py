@@ -1,12 +1,20 @@
-from typing import List
+from typing import Optional
 
 from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, selectinload
+from starlette.requests import Request
 
-from src.routers.auth import get_current_active_user, current_user_organizer
+from src.routers.auth import get_current_active_user, current_user_organizer, Principal
+from src.utility.catalog_cache import prize_catalog, catalog_response
 from src.utility.database import models
-from src.utility.database.database import get_db
+from src.utility.database.database import get_db, get_async_db
+from src.utility.invalidation import publish_invalidation, publish_invalidation_async
+from src.utility.pagination import PageParams, page_params, paginate
+from src.utility.repository import update_by_id_db
 from src.utility.responses import PrizeNotFoundException, ProjectNotFoundException
+from src.utility.schemas.Page import Page
 from src.utility.schemas.Prize import Prize, PrizeCreate
 from src.utility.schemas.Project import Project
 from src.utility.schemas.User import User
@@ -14,8 +22,8 @@ from src.utility.schemas.User import User
 prize_router = APIRouter()
 
 
-def load_prize_from_id(prize_id: int, db: Session = Depends(get_db)):
-    prize = db.query(models.PrizeModel).filter(models.PrizeModel.id == prize_id).first()
+async def load_prize_from_id_async(prize_id: int, db: AsyncSession = Depends(get_async_db)):
+    prize = await db.get(models.PrizeModel, prize_id)
 
     if prize is None:
         raise PrizeNotFoundException
@@ -29,36 +37,62 @@ def load_prize_from_id(prize_id: int, db: Session = Depends(get_db)):
 #
 # -------------------------------------------------------------------------------
 
-@prize_router.get("/all", response_model=List[Prize])
-async def get_all_prizes(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
-    return db.query(models.PrizeModel).all()
+@prize_router.get("/all", response_model=Page[Prize])
+async def get_all_prizes(request: Request,
+                         selectable: Optional[bool] = None,
+                         sponsor: Optional[str] = None,
+                         page: PageParams = Depends(page_params),
+                         current_user: Principal = Depends(get_current_active_user),
+                         db: AsyncSession = Depends(get_async_db)):
+    async def load() -> bytes:
+        statement = select(models.PrizeModel)
+        if selectable is not None:
+            statement = statement.where(models.PrizeModel.selectable == selectable)
+        if sponsor is not None:
+            statement = statement.where(models.PrizeModel.sponsor == sponsor)
+
+        return Page[Prize].parse_obj(await paginate(db, statement, models.PrizeModel, page)).json().encode()
+
+    entry = await prize_catalog.get_or_load(('all', selectable, sponsor, page.limit, page.after_id), load)
+    return catalog_response(request, entry)
 
 
 @prize_router.get("/{prize_id}", response_model=Prize)
-async def get_prize(current_user: User = Depends(get_current_active_user),
-                    prize: Prize = Depends(load_prize_from_id)):
-    return prize
+async def get_prize(request: Request,
+                    prize_id: int,
+                    current_user: Principal = Depends(get_current_active_user),
+                    db: AsyncSession = Depends(get_async_db)):
+    async def load() -> bytes:
+        return Prize.from_orm(await load_prize_from_id_async(prize_id, db)).json().encode()
+
+    entry = await prize_catalog.get_or_load(('prize', prize_id), load)
+    return catalog_response(request, entry)
 
 
 @prize_router.post("/new", response_model=Prize, status_code=201)
-async def create_prize(prize: PrizeCreate, current_user: User = Depends(get_current_active_user),
-                       db: Session = Depends(get_db)):
+async def create_prize(prize: PrizeCreate, current_user: Principal = Depends(get_current_active_user),
+                       db: AsyncSession = Depends(get_async_db)):
     new_prize = models.PrizeModel(**prize.dict())
     db.add(new_prize)
-    db.commit()
-    db.refresh(new_prize)
+    await db.flush()
+    await publish_invalidation_async(db, 'prize', new_prize.id)
+    await db.commit()
+    await db.refresh(new_prize)
+    prize_catalog.bump()
     return new_prize
 
 
 @prize_router.delete("/{prize_id}")
 async def delete_prize(
         prize_id: int,
-        prize: Prize = Depends(load_prize_from_id),
-        current_user: User = Depends(get_current_active_user),
-        db: Session = Depends(get_db)
+        prize: Prize = Depends(load_prize_from_id_async),
+        current_user: Principal = Depends(get_current_active_user),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    db.delete(prize)
-    db.commit()
+    await db.delete(prize)
+    await publish_invalidation_async(db, 'prize', prize_id)
+    await db.commit()
+    prize_catalog.bump()
 
     return {
         "detail": "Prize successfully deleted.",
@@ -66,17 +100,21 @@ async def delete_prize(
     }
 
 
-@prize_router.put("/{prize_id}", dependencies=[Depends(load_prize_from_id)], response_model=Prize)
+@prize_router.put("/{prize_id}", response_model=Prize)
 def update_prize(
         prize_id: int,
         prize: PrizeCreate,
-        current_user: User = Depends(get_current_active_user),
+        current_user: Principal = Depends(get_current_active_user),
         db: Session = Depends(get_db)
 ):
-    db.query(models.PrizeModel).filter(models.PrizeModel.id == prize_id).update({**prize.dict()})
+    updated_prize = Prize.from_orm(
+        update_by_id_db(db, models.PrizeModel, prize_id, prize.dict(), PrizeNotFoundException)
+    )
+    publish_invalidation(db, 'prize', prize_id)
     db.commit()
+    prize_catalog.bump()
 
-    return load_prize_from_id(prize_id, db)
+    return updated_prize
 
 
 # -------------------------------------------------------------------------------
@@ -90,18 +128,24 @@ def update_prize(
 async def assign_winner_to_prize(
         prize_id: int,
         project_id: int,
-        prize: Prize = Depends(load_prize_from_id),
-        current_user: User = Depends(current_user_organizer),
-        db: Session = Depends(get_db)
+        prize: Prize = Depends(load_prize_from_id_async),
+        current_user: Principal = Depends(current_user_organizer),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    project: Project = db.query(models.ProjectModel).filter(models.ProjectModel.id == project_id).first()
+    project: Project = await db.scalar(
+        select(models.ProjectModel)
+        .options(selectinload(models.ProjectModel.prizes_won))
+        .where(models.ProjectModel.id == project_id)
+    )
 
     if project is None:
         raise ProjectNotFoundException
 
-    project.prizes_won.append(prize)
-    db.add(project)
-    db.commit()
+    if prize not in project.prizes_won:
+        project.prizes_won.append(prize)
+    await publish_invalidation_async(db, 'prize', prize_id)
+    await db.commit()
+    prize_catalog.bump()
 
     return prize
 
@@ -110,17 +154,23 @@ async def assign_winner_to_prize(
 async def remove_winner_from_prize(
         prize_id: int,
         project_id: int,
-        prize: Prize = Depends(load_prize_from_id),
-        current_user: User = Depends(current_user_organizer),
-        db: Session = Depends(get_db)
+        prize: Prize = Depends(load_prize_from_id_async),
+        current_user: Principal = Depends(current_user_organizer),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    project: Project = db.query(models.ProjectModel).filter(models.ProjectModel.id == project_id).first()
+    project: Project = await db.scalar(
+        select(models.ProjectModel)
+        .options(selectinload(models.ProjectModel.prizes_won))
+        .where(models.ProjectModel.id == project_id)
+    )
 
     if project is None:
         raise ProjectNotFoundException
 
-    project.prizes_won.remove(prize)
-    db.add(project)
-    db.commit()
+    if prize in project.prizes_won:
+        project.prizes_won.remove(prize)
+    await publish_invalidation_async(db, 'prize', prize_id)
+    await db.commit()
+    prize_catalog.bump()
 
     return prize
@@ -1,27 +1,44 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, Query, status
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
+from sqlalchemy.orm.attributes import set_committed_value
+from starlette.responses import JSONResponse, StreamingResponse
 
-from src.routers.auth import current_user_admin, current_user_participant, current_user_organizer
+from src.routers.auth import current_user_participant, current_user_organizer, Principal
 from src.utility.database import models
-from src.utility.database.database import get_db
+from src.utility.database.database import get_db, get_async_db
+from src.utility.database.loaders import project_load_options, user_load_options
+from src.utility.exports import export_projects_csv, export_projects_ndjson
+from src.utility.pagination import PageParams, page_params, paginate, RankedPageParams, ranked_page_params
+from src.utility.repository import update_by_id_db, owner_scope
 from src.utility.responses import ProjectNotFoundException, UserNotFoundException, CredentialException, \
-    PrizeNotFoundException
+    PrizeNotFoundException, PrizeNotSelectableException
 from src.utility.schemas.Project import ProjectCreate
-from src.utility.schemas.Project import Project
+from src.utility.schemas.Page import Page
+from src.utility.schemas.Project import Project, ProjectSearchResult
 from src.utility.schemas.User import User
+from src.utility.search import search_projects_db, MAX_SEARCH_QUERY_LENGTH
 
 
 project_router = APIRouter()
 
 
-def load_project_from_id(project_id: int, db: Session = Depends(get_db)):
-    project = db.query(models.ProjectModel).filter(models.ProjectModel.id == project_id).first()
+async def load_project_from_id_async(project_id: int,
+                                     current_user: Principal = Depends(current_user_participant),
+                                     db: AsyncSession = Depends(get_async_db)):
+    # Participants can only load their own project
+    scope = owner_scope(models.ProjectModel, current_user, ProjectNotFoundException)
+    project = await db.scalar(
+        select(models.ProjectModel).options(*project_load_options)
+        .where(models.ProjectModel.id == project_id, scope.predicate)
+    )
 
     if project is None:
-        raise ProjectNotFoundException
+        raise scope.not_found
 
     return project
 
@@ -32,28 +49,63 @@ def load_project_from_id(project_id: int, db: Session = Depends(get_db)):
 #
 # -------------------------------------------------------------------------------
 
-@project_router.get("/all", response_model=List[Project], dependencies=[Depends(current_user_organizer)])
+@project_router.get("/all", response_model=Page[Project], dependencies=[Depends(current_user_organizer)])
 async def get_all_projects(
-        db: Session = Depends(get_db),
+        inPersonProject: Optional[bool] = None,
+        requiresPowerOutlet: Optional[bool] = None,
+        page: PageParams = Depends(page_params),
+        db: AsyncSession = Depends(get_async_db),
 ):
-    return db.query(models.ProjectModel).all()
+    statement = select(models.ProjectModel).options(*project_load_options)
+    if inPersonProject is not None:
+        statement = statement.where(models.ProjectModel.inPersonProject == inPersonProject)
+    if requiresPowerOutlet is not None:
+        statement = statement.where(models.ProjectModel.requiresPowerOutlet == requiresPowerOutlet)
 
+    return await paginate(db, statement, models.ProjectModel, page)
+
+
+@project_router.get("/search", response_model=Page[ProjectSearchResult],
+                    dependencies=[Depends(current_user_organizer)])
+async def search_projects(
+        q: str = Query(..., min_length=1, max_length=MAX_SEARCH_QUERY_LENGTH),
+        page: RankedPageParams = Depends(ranked_page_params),
+        db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Search projects by name, technologies, description, functionality and architecture. Supports "quoted phrases",
+    OR and -excluded words. Results are ordered by relevance, each with a snippet highlighting the matching words.
+    """
+    return await search_projects_db(db, q, page)
+
+
+@project_router.get("/export", dependencies=[Depends(current_user_organizer)])
+async def export_projects(format: str = 'ndjson', db: AsyncSession = Depends(get_async_db)):
+    """
+    Stream every project, with its attempted and won prizes, as NDJSON (one project per line) or CSV.
+    """
+    if format == 'csv':
+        return StreamingResponse(export_projects_csv(db), media_type='text/csv',
+                                 headers={'Content-Disposition': 'attachment; filename="projects.csv"'})
+    if format == 'ndjson':
+        return StreamingResponse(export_projects_ndjson(db), media_type='application/x-ndjson',
+                                 headers={'Content-Disposition': 'attachment; filename="projects.ndjson"'})
+
+    return JSONResponse(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        content={"detail": "Export format must be either ndjson or csv."},
+    )
 
-@project_router.get("/{project_id}", response_model=Project)
-async def get_project(current_user: User = Depends(current_user_participant),
-                      project: Project = Depends(load_project_from_id)):
-    # Ensure that users can only view their own projects
-    if current_user.role.name == 'participant':
-        if not current_user.project or project.id != current_user.project.id:
-            return CredentialException()
 
+@project_router.get("/{project_id}", response_model=Project)
+async def get_project(project: Project = Depends(load_project_from_id_async)):
     return project
 
 
 @project_router.post("/new", response_model=Project, status_code=201)
 def create_project(
         project: ProjectCreate,
-        current_user: User = Depends(current_user_participant),
+        current_user: Principal = Depends(current_user_participant),
         db: Session = Depends(get_db)
 ):
     u: User = db.query(models.UserModel).filter(models.UserModel.id == current_user.id).first()
@@ -81,17 +133,11 @@ def create_project(
 @project_router.delete("/{project_id}")
 async def delete_project(
         project_id: int,
-        project: Project = Depends(load_project_from_id),
-        current_user: User = Depends(current_user_participant),
-        db: Session = Depends(get_db)
+        project: Project = Depends(load_project_from_id_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
-
-    if current_user.role.name == 'participant':
-        if not current_user.project or project_id != current_user.project.id:
-            return CredentialException()
-
-    db.delete(project)
-    db.commit()
+    await db.delete(project)
+    await db.commit()
 
     return {
         "detail": "Project successfully deleted.",
@@ -99,25 +145,19 @@ async def delete_project(
     }
 
 
-@project_router.put("/{project_id}",
-                    dependencies=[Depends(load_project_from_id)],
-                    response_model=Project
-                    )
+@project_router.put("/{project_id}", response_model=Project)
 def update_project(
         project_id: int,
         project: ProjectCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(current_user_participant),
+        current_user: Principal = Depends(current_user_participant),
 ):
-
-    if current_user.role.name == 'participant':
-        if not current_user.project or project_id != current_user.project.id:
-            return CredentialException()
-
-    db.query(models.ProjectModel).filter(models.ProjectModel.id == project_id).update({**project.dict()})
+    scope = owner_scope(models.ProjectModel, current_user, ProjectNotFoundException)
+    updated_project = Project.from_orm(update_by_id_db(db, models.ProjectModel, project_id, project.dict(),
+                                                       scope.not_found, project_load_options, scope.predicate))
     db.commit()
 
-    return load_project_from_id(project_id, db)
+    return updated_project
 
 
 # -------------------------------------------------------------------------------
@@ -131,16 +171,17 @@ def update_project(
 def assign_user_to_project(
         project_id: int,
         user_id: int,
-        current_user: User = Depends(current_user_participant),
+        current_user: Principal = Depends(current_user_participant),
         db: Session = Depends(get_db),
 ):
     user_to_assign: User = db.query(models.UserModel).filter(models.UserModel.id == user_id).first()
     if not user_to_assign:
-        return UserNotFoundException()
+        raise UserNotFoundException()
 
-    if current_user.role.name == 'participant':
-        if not current_user.project or project_id != current_user.project.id:
-            return CredentialException()
+    # Participants can only add users to their own project
+    scope = owner_scope(models.ProjectModel, current_user, ProjectNotFoundException)
+    if db.scalar(select(models.ProjectModel.id).where(models.ProjectModel.id == project_id, scope.predicate)) is None:
+        raise scope.not_found
 
     if user_to_assign.project:
         return JSONResponse(
@@ -161,46 +202,56 @@ def assign_user_to_project(
 def remove_user_from_project(
         user_id: int,
         db: Session = Depends(get_db),
-        current_user: User = Depends(current_user_participant)
+        current_user: Principal = Depends(current_user_participant)
 ):
     # Ensure that participants can only remove their self
-    if current_user.role.name == 'participant' and user_id != current_user.id:
+    if current_user.role == 'participant' and user_id != current_user.id:
         raise CredentialException()
 
     db.query(models.UserModel).filter(models.UserModel.id == user_id).update({'project_id': None})
     db.commit()
 
-    return db.query(models.UserModel).filter(models.UserModel.id == user_id).first()
+    return db.query(models.UserModel).options(*user_load_options).filter(models.UserModel.id == user_id).first()
 
 
 @project_router.post("/{project_id}/attempt_prizes", response_model=Project)
 async def attempt_prizes(
         project_id: int,
         attempted_prizes: List[int],
-        project: Project = Depends(load_project_from_id),
-        current_user: User = Depends(current_user_participant),
-        db: Session = Depends(get_db)
+        project: Project = Depends(load_project_from_id_async),
+        db: AsyncSession = Depends(get_async_db)
 ):
+    # Fetch and validate the requested prizes as a set, in a single query
+    requested_ids = list(dict.fromkeys(attempted_prizes))
+    prizes = (await db.scalars(
+        select(models.PrizeModel).where(models.PrizeModel.id.in_(requested_ids))
+    )).all() if requested_ids else []
+    prizes_by_id = {prize.id: prize for prize in prizes}
+
+    if len(prizes_by_id) != len(requested_ids):
+        raise PrizeNotFoundException()
+
+    # Only write the rows that changed, so re-saving an unchanged list is a no-op
+    current_ids = {prize.id for prize in project.prizes_attempted}
+    added_ids = [prize_id for prize_id in requested_ids if prize_id not in current_ids]
+    removed_ids = current_ids.difference(requested_ids)
+
+    # Prizes that are no longer selectable may be kept, but not newly attempted
+    if any(not prizes_by_id[prize_id].selectable for prize_id in added_ids):
+        raise PrizeNotSelectableException()
+
+    association = models.prize_project_attempt_association
+    if removed_ids:
+        await db.execute(
+            delete(association).where(association.c.project_id == project_id, association.c.prize_id.in_(removed_ids))
+        )
+    if added_ids:
+        await db.execute(
+            insert(association).values([{'project_id': project_id, 'prize_id': prize_id} for prize_id in added_ids])
+            .on_conflict_do_nothing()
+        )
 
-    if project is None:
-        raise ProjectNotFoundException
-
-    # Only allow participants to modify their own project
-    if current_user.role == 'participant' and current_user.project != project_id:
-        raise CredentialException()
-
-    project.prizes_attempted = []
-
-    for prize_id in attempted_prizes:
-        prize = db.query(models.PrizeModel).filter(models.PrizeModel.id == prize_id).first()
-
-        if not prize:
-            raise PrizeNotFoundException()
-
-        project.prizes_attempted.append(prize)
-        db.add(project)
-
-    db.commit()
-    db.refresh(project)
+    await db.commit()
+    set_committed_value(project, 'prizes_attempted', [prizes_by_id[prize_id] for prize_id in requested_ids])
 
     return project
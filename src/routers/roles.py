@@ -1,12 +1,19 @@
-from typing import List
-
 from fastapi import APIRouter, Depends
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.requests import Request
 
-from src.routers.auth import current_user_admin
+from src.routers.auth import current_user_admin, revoke_user_tokens, principal_cache, token_version_cache, Principal
+from src.utility.catalog_cache import role_catalog, catalog_response
 from src.utility.database import models
-from src.utility.database.database import get_db
+from src.utility.database.database import get_db, get_async_db
+from src.utility.database.loaders import user_load_options
+from src.utility.invalidation import publish_invalidation, publish_invalidation_async
+from src.utility.pagination import PageParams, page_params, paginate
+from src.utility.repository import update_by_id_db
 from src.utility.responses import RoleNotFoundException, UserNotFoundException
+from src.utility.schemas.Page import Page
 from src.utility.schemas.Role import RoleCreate
 from src.utility.schemas.Role import Role
 from src.utility.schemas.User import User
@@ -14,8 +21,8 @@ from src.utility.schemas.User import User
 role_router = APIRouter()
 
 
-def load_role_from_id(role_id: int, db: Session = Depends(get_db)):
-    role = db.query(models.RoleModel).filter(models.RoleModel.id == role_id).first()
+async def load_role_from_id_async(role_id: int, db: AsyncSession = Depends(get_async_db)):
+    role = await db.get(models.RoleModel, role_id)
 
     if role is None:
         raise RoleNotFoundException
@@ -29,38 +36,64 @@ def load_role_from_id(role_id: int, db: Session = Depends(get_db)):
 #
 # -------------------------------------------------------------------------------
 
-@role_router.get("/all", response_model=List[Role], dependencies=[Depends(current_user_admin)])
+@role_router.get("/all", response_model=Page[Role], dependencies=[Depends(current_user_admin)])
 async def get_all_roles(
-        db: Session = Depends(get_db),
+        request: Request,
+        page: PageParams = Depends(page_params),
+        db: AsyncSession = Depends(get_async_db),
 ):
-    return db.query(models.RoleModel).all()
+    async def load() -> bytes:
+        roles = await paginate(db, select(models.RoleModel), models.RoleModel, page)
+        return Page[Role].parse_obj(roles).json().encode()
+
+    entry = await role_catalog.get_or_load(('all', page.limit, page.after_id), load)
+    return catalog_response(request, entry)
 
 
 @role_router.get("/{role_id}", response_model=Role)
-async def get_role(current_user: User = Depends(current_user_admin),
-                   role: Role = Depends(load_role_from_id)):
-    return role
+async def get_role(request: Request,
+                   role_id: int,
+                   current_user: Principal = Depends(current_user_admin),
+                   db: AsyncSession = Depends(get_async_db)):
+    async def load() -> bytes:
+        return Role.from_orm(await load_role_from_id_async(role_id, db)).json().encode()
+
+    entry = await role_catalog.get_or_load(('role', role_id), load)
+    return catalog_response(request, entry)
 
 
 @role_router.post("/new", response_model=Role, status_code=201)
-async def create_role(role: RoleCreate, current_user: User = Depends(current_user_admin),
-                      db: Session = Depends(get_db)):
+async def create_role(role: RoleCreate, current_user: Principal = Depends(current_user_admin),
+                      db: AsyncSession = Depends(get_async_db)):
     new_role = models.RoleModel(**role.dict())
     db.add(new_role)
-    db.commit()
-    db.refresh(new_role)
+    await db.flush()
+    await publish_invalidation_async(db, 'role', new_role.id)
+    await db.commit()
+    await db.refresh(new_role)
+    role_catalog.bump()
     return new_role
 
 
 @role_router.delete("/{role_id}")
 async def delete_role(
         role_id: int,
-        role: Role = Depends(load_role_from_id),
-        current_user: User = Depends(current_user_admin),
-        db: Session = Depends(get_db)
+        role: Role = Depends(load_role_from_id_async),
+        current_user: Principal = Depends(current_user_admin),
+        db: AsyncSession = Depends(get_async_db)
 ):
-    db.delete(role)
-    db.commit()
+    # Revoke the tokens of the role's users before deleting it clears their role_id
+    await db.execute(
+        update(models.UserModel).where(models.UserModel.role_id == role_id)
+        .values(token_version=models.UserModel.token_version + 1)
+        .execution_options(synchronize_session=False)
+    )
+    await db.delete(role)
+    await publish_invalidation_async(db, 'role', role_id)
+    await db.commit()
+    principal_cache.clear()
+    token_version_cache.clear()
+    role_catalog.bump()
 
     return {
         "detail": "Role successfully deleted.",
@@ -68,20 +101,23 @@ async def delete_role(
     }
 
 
-@role_router.put("/{role_id}",
-                 dependencies=[Depends(load_role_from_id)],
-                 response_model=Role
-                 )
+@role_router.put("/{role_id}", response_model=Role)
 def update_role(
         role_id: int,
         role: RoleCreate,
         db: Session = Depends(get_db),
-        current_user: User = Depends(current_user_admin),
+        current_user: Principal = Depends(current_user_admin),
 ):
-    db.query(models.RoleModel).filter(models.RoleModel.id == role_id).update({**role.dict()})
+    updated_role = Role.from_orm(update_by_id_db(db, models.RoleModel, role_id, role.dict(), RoleNotFoundException))
+    db.query(models.UserModel).filter(models.UserModel.role_id == role_id).update(
+        {'token_version': models.UserModel.token_version + 1}, synchronize_session=False)
+    publish_invalidation(db, 'role', role_id)
     db.commit()
+    principal_cache.clear()
+    token_version_cache.clear()
+    role_catalog.bump()
 
-    return load_role_from_id(role_id, db)
+    return updated_role
 
 
 # Role Assignment
@@ -96,16 +132,27 @@ def assign_user_to_role(
     if not u:
         return UserNotFoundException()
 
-    db.query(models.UserModel).filter(models.UserModel.id == user_id).update({'role_id': role_id})
+    db.query(models.UserModel).filter(models.UserModel.id == user_id).update(
+        {'role_id': role_id, 'token_version': models.UserModel.token_version + 1})
+    publish_invalidation(db, 'user', user_id)
     db.commit()
 
-    return db.query(models.UserModel).filter(models.UserModel.id == user_id).first()
+    u = db.query(models.UserModel).options(*user_load_options).filter(models.UserModel.id == user_id).first()
+    revoke_user_tokens(u.id, u.email)
+
+    return u
 
 
 @role_router.post("/unassign/{user_id}", response_model=User, dependencies=[Depends(current_user_admin)])
 def remove_user_roles(user_id: int, db: Session = Depends(get_db)):
 
-    db.query(models.UserModel).filter(models.UserModel.id == user_id).update({'role_id': None})
+    db.query(models.UserModel).filter(models.UserModel.id == user_id).update(
+        {'role_id': None, 'token_version': models.UserModel.token_version + 1})
+    publish_invalidation(db, 'user', user_id)
     db.commit()
 
-    return db.query(models.UserModel).filter(models.UserModel.id == user_id).first()
+    u = db.query(models.UserModel).options(*user_load_options).filter(models.UserModel.id == user_id).first()
+    if u:
+        revoke_user_tokens(u.id, u.email)
+
+    return u
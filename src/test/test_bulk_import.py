@@ -0,0 +1,31 @@
+import io
+
+from src.utility.bulk_import import read_import_rows
+
+
+def parse(content: bytes, content_type: str) -> list:
+    return list(read_import_rows(io.BytesIO(content), content_type))
+
+
+def test_ndjson_invalid_utf8_only_invalidates_its_row():
+    rows = parse(b'\xff\xfe\n{"email": "a@example.com"}\n', 'application/x-ndjson')
+
+    assert rows[0] == (1, None, 'Row is not valid UTF-8.')
+    assert rows[1] == (2, {'email': 'a@example.com'}, None)
+
+
+def test_csv_parse_errors_end_with_invalid_row():
+    header = b'email,first_name,last_name,password\n'
+
+    rows = parse(header + b'a@example.com,A,B,password\n\xff\xfe,A,B,password\n', 'text/csv')
+    assert rows[0][2] is None
+    assert rows[1][0] == 2 and rows[1][1] is None and 'UTF-8' in rows[1][2]
+
+    rows = parse(header + b'a@example.com,A,B,pass\x00word\n', 'text/csv')
+    assert rows[0][0] == 1 and rows[0][1] is None and 'CSV' in rows[0][2]
+
+
+def test_csv_extra_columns_are_invalid():
+    rows = parse(b'email,first_name,last_name,password\na@example.com,A,B,password,extra\n', 'text/csv')
+
+    assert rows == [(1, None, 'Row has more columns than the header.')]
@@ -0,0 +1,68 @@
+import asyncio
+import time
+
+import pytest
+
+from src.utility.cache import TTLCache
+from src.utility.catalog_cache import CatalogCache
+
+
+@pytest.mark.timeout(5)
+def test_hit_and_miss_counters():
+    cache = TTLCache(maxsize=4, ttl=60)
+    assert cache.get('a') is None
+    cache.set('a', 1)
+    assert cache.get('a') == 1
+
+    stats = cache.stats()
+    assert stats['hits'] == 1
+    assert stats['misses'] == 1
+    assert stats['size'] == 1
+
+
+@pytest.mark.timeout(5)
+def test_entries_expire():
+    cache = TTLCache(maxsize=4, ttl=0.01)
+    cache.set('a', 1)
+    time.sleep(0.02)
+    assert cache.get('a') is None
+    assert cache.stats()['size'] == 0
+
+
+@pytest.mark.timeout(5)
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('a')
+    cache.set('c', 3)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert cache.get('c') == 3
+
+
+@pytest.mark.timeout(5)
+def test_invalidate():
+    cache = TTLCache(maxsize=4, ttl=60)
+    cache.set('a', 1)
+    cache.invalidate('a')
+    cache.invalidate('missing')
+    assert cache.get('a') is None
+
+
+@pytest.mark.timeout(5)
+def test_catalog_cache_reloads_after_bump():
+    catalog = CatalogCache('test')
+    bodies = iter([b'[1]', b'[1, 2]'])
+
+    async def load():
+        return next(bodies)
+
+    first = asyncio.run(catalog.get_or_load('all', load))
+    assert asyncio.run(catalog.get_or_load('all', load)) == first
+
+    catalog.bump()
+    second = asyncio.run(catalog.get_or_load('all', load))
+    assert second.body == b'[1, 2]'
+    assert second.etag != first.etag
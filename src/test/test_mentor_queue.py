@@ -0,0 +1,82 @@
+import asyncio
+import time
+import uuid
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.pool import NullPool
+
+from src.utility.database import models
+from src.utility.database.database import SessionLocal, ASYNC_SQLALCHEMY_DATABASE_URL
+from src.utility.database_wrappers import claim_next_mentorship_request_db
+
+MENTORS = 24
+HOLD_SECONDS = 0.5
+
+# Above any urgency a participant can pick, so that these requests are claimed before any others in the database
+URGENCY = 1000
+
+
+@pytest.fixture
+def queue():
+    """
+    A mentor, and more unclaimed requests than there are mentors to claim them.
+    """
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+
+    mentor = models.UserModel(email=f'mentor-{tag}@email.com', first_name='Queue', last_name='Mentor', password='')
+    db.add(mentor)
+    db.flush()
+    requests = [models.MentorshipRequestModel(title=f'Queue {tag} {i}', description='', technology_used='',
+                                              image_url='', urgency=URGENCY, resolved=False)
+                for i in range(MENTORS + 4)]
+    db.add_all(requests)
+    db.commit()
+
+    yield mentor.id, [request.id for request in requests]
+
+    for request in requests:
+        db.delete(request)
+    db.delete(mentor)
+    db.commit()
+    db.close()
+
+
+async def claim_concurrently(mentor_id: int):
+    # Each mentor needs its own connection, created on this event loop
+    engine = create_async_engine(ASYNC_SQLALCHEMY_DATABASE_URL, poolclass=NullPool)
+
+    async def claim():
+        async with AsyncSession(engine) as db:
+            claimed_id = (await claim_next_mentorship_request_db(db, mentor_id)).id
+            # Hold the row lock, as a slow request would, while the other mentors claim
+            await asyncio.sleep(HOLD_SECONDS)
+            await db.commit()
+            return claimed_id
+
+    try:
+        return await asyncio.gather(*[claim() for _ in range(MENTORS)])
+    finally:
+        await engine.dispose()
+
+
+def test_concurrent_claims_are_not_blocked_or_duplicated(queue):
+    mentor_id, request_ids = queue
+
+    start = time.perf_counter()
+    claimed = asyncio.run(claim_concurrently(mentor_id))
+    elapsed = time.perf_counter() - start
+
+    assert len(set(claimed)) == MENTORS
+    # The most urgent requests are handed out oldest first
+    assert sorted(claimed) == request_ids[:MENTORS]
+    # Had claims waited on each other's locks, they would have taken MENTORS * HOLD_SECONDS
+    assert elapsed < 3 * HOLD_SECONDS
+
+    db = SessionLocal()
+    mentors = dict(db.query(models.MentorshipRequestModel.id, models.MentorshipRequestModel.mentor_user_id)
+                   .filter(models.MentorshipRequestModel.id.in_(request_ids)))
+    db.close()
+    assert all(mentors[request_id] == mentor_id for request_id in request_ids[:MENTORS])
+    assert all(mentors[request_id] is None for request_id in request_ids[MENTORS:])
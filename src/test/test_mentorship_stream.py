@@ -0,0 +1,105 @@
+import asyncio
+import select
+import uuid
+
+import psycopg2
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.routers.auth import get_current_user, Principal
+from src.utility.database import models
+from src.utility.database.database import SessionLocal
+from src.utility.invalidation import INVALIDATION_CHANNEL
+from src.utility.mentorship_stream import MentorshipRequestBroadcaster, SUBSCRIBER_QUEUE_SIZE, format_event, \
+    MENTORSHIP_REQUEST_ENTITY
+from src.utility.settings import settings
+
+
+def event(event_id: str) -> bytes:
+    return format_event('updated', '{}', event_id)
+
+
+def test_resume_replays_missed_events():
+    async def run():
+        broadcaster = MentorshipRequestBroadcaster()
+        for event_id in ['a', 'b', 'c']:
+            broadcaster.broadcast(event_id, event(event_id))
+
+        _, replay = broadcaster.subscribe('a')
+        assert replay == [event('b'), event('c')]
+
+        # An id this worker does not have (evicted, or from before a reset) needs a snapshot
+        _, replay = broadcaster.subscribe('unknown')
+        assert replay is None
+
+    asyncio.run(run())
+
+
+def test_slow_subscriber_is_closed():
+    async def run():
+        broadcaster = MentorshipRequestBroadcaster()
+        slow, _ = broadcaster.subscribe(None)
+        fast, _ = broadcaster.subscribe(None)
+
+        for i in range(SUBSCRIBER_QUEUE_SIZE + 1):
+            broadcaster.broadcast(str(i), event(str(i)))
+            while not fast.queue.empty():
+                fast.queue.get_nowait()
+
+        assert slow.closed and slow not in broadcaster.subscribers
+        assert not fast.closed and fast in broadcaster.subscribers
+
+    asyncio.run(run())
+
+
+def test_reset_closes_subscribers_and_forgets_events():
+    async def run():
+        broadcaster = MentorshipRequestBroadcaster()
+        broadcaster.broadcast('a', event('a'))
+        subscription, _ = broadcaster.subscribe(None)
+
+        broadcaster.handle_change(None)
+
+        assert subscription.closed and subscription.queue.get_nowait() is None
+        assert broadcaster.subscribe('a')[1] is None
+
+    asyncio.run(run())
+
+
+def test_create_publishes_created_event():
+    db = SessionLocal()
+    user = models.UserModel(email=f'stream-{uuid.uuid4().hex[:8]}@email.com', first_name='Stream', last_name='Test',
+                            password='')
+    db.add(user)
+    db.commit()
+
+    listener = psycopg2.connect(settings.postgres_dsn)
+    listener.autocommit = True
+    listener.cursor().execute(f'LISTEN {INVALIDATION_CHANNEL}')
+
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=user.id, email=user.email, role='participant')
+    try:
+        with TestClient(app) as client:
+            response = client.post('/mentorship_requests/new', json={
+                'title': 'Stream', 'description': '', 'technology_used': '', 'urgency': 1, 'image_url': ''
+            })
+        assert response.status_code == 201, response.text
+        assert response.json()['participant_user_id'] == user.id
+
+        # The notification that feeds every worker's stream, sent when the request was committed
+        expected = f"{MENTORSHIP_REQUEST_ENTITY}:{response.json()['id']}:created:"
+        payloads = []
+        while not any(payload.startswith(expected) for payload in payloads) \
+                and select.select([listener], [], [], 2)[0]:
+            listener.poll()
+            payloads += [notification.payload for notification in listener.notifies]
+            listener.notifies.clear()
+        assert any(payload.startswith(expected) for payload in payloads), payloads
+    finally:
+        app.dependency_overrides.pop(get_current_user)
+        listener.close()
+        db.query(models.MentorshipRequestModel).filter(models.MentorshipRequestModel.participant_user_id == user.id) \
+            .delete()
+        db.delete(user)
+        db.commit()
+        db.close()
@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+
+from src.main import app
+from src.utility.database import models
+from src.utility.database.database import SessionLocal
+from src.utility.password_hashing import password_hasher, pwd_context, PASSWORD_HASH_RETRY_AFTER_SECONDS, \
+    BCRYPT_ROUNDS
+
+PASSWORD = 'password'
+
+# Cheaper than the configured cost, as a hash stored before the cost was raised would be
+OUTDATED_ROUNDS = 4 if BCRYPT_ROUNDS != 4 else 5
+
+
+@pytest.fixture
+def user():
+    db = SessionLocal()
+    outdated_context = CryptContext(schemes=['bcrypt'], bcrypt__rounds=OUTDATED_ROUNDS)
+    user = models.UserModel(email=f'hashing-{uuid.uuid4().hex[:8]}@email.com', first_name='Password',
+                            last_name='Hashing', password=outdated_context.hash(PASSWORD))
+    db.add(user)
+    db.commit()
+
+    yield user.id, user.email
+
+    db.delete(user)
+    db.commit()
+    db.close()
+
+
+def test_full_queue_is_rejected_with_retry_after(user, monkeypatch):
+    _, email = user
+    monkeypatch.setattr(password_hasher, 'pending', password_hasher.workers + password_hasher.max_queue)
+    rejected = password_hasher.rejected
+
+    with TestClient(app) as client:
+        response = client.post('/auth/login', data={'username': email, 'password': PASSWORD})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == str(PASSWORD_HASH_RETRY_AFTER_SECONDS)
+    assert password_hasher.rejected == rejected + 1
+
+
+def test_login_rehashes_outdated_password(user):
+    user_id, email = user
+
+    with TestClient(app) as client:
+        assert client.post('/auth/login', data={'username': email, 'password': PASSWORD}).status_code == 200
+
+    with SessionLocal() as db:
+        stored = db.get(models.UserModel, user_id).password
+    assert not pwd_context.needs_update(stored)
+    assert pwd_context.verify(PASSWORD, stored)
@@ -0,0 +1,58 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.routers.auth import create_access_token, current_user_admin, principal_cache, Principal
+from src.utility.database import models
+from src.utility.database.database import SessionLocal
+from src.utility.settings import settings
+
+
+@pytest.fixture
+def user_and_role():
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+    role = models.RoleModel(name=f'cached-{tag}', description='')
+    user = models.UserModel(email=f'cached-{tag}@email.com', first_name='Principal', last_name='Cache', password='')
+    db.add_all([role, user])
+    db.commit()
+
+    app.dependency_overrides[current_user_admin] = lambda: Principal(id=0, email='admin', role='admin')
+    yield user.id, user.email, role.id, role.name
+    app.dependency_overrides.pop(current_user_admin)
+
+    db.delete(user)
+    db.delete(role)
+    db.commit()
+    db.close()
+
+
+def test_permission_changes_evict_cached_principal(user_and_role, monkeypatch):
+    user_id, email, role_id, role_name = user_and_role
+    # Without the invalidation listener, only the endpoint itself can evict this worker's cached principal
+    monkeypatch.setattr(settings, 'cache_invalidation_listener', False)
+    # A token without role claims, which is authorized through the principal cache
+    headers = {'Authorization': f'Bearer {create_access_token(data={"email": email})}'}
+
+    def assert_evicted_and_reloaded(role, status_code):
+        assert principal_cache.get(email) is None
+        assert client.get('/auth/profile', headers=headers).status_code == status_code
+        assert principal_cache.get(email).role == role
+
+    with TestClient(app) as client:
+        assert client.get('/auth/profile', headers=headers).status_code == 200
+        assert principal_cache.get(email).role is None
+
+        assert client.post(f'/roles/{role_id}/assign/{user_id}').status_code == 200
+        assert_evicted_and_reloaded(role_name, 200)
+
+        assert client.post(f'/auth/{user_id}/disable').status_code == 200
+        assert_evicted_and_reloaded(role_name, 401)
+
+        assert client.post(f'/auth/{user_id}/enable').status_code == 200
+        assert_evicted_and_reloaded(role_name, 200)
+
+        assert client.post(f'/roles/unassign/{user_id}').status_code == 200
+        assert_evicted_and_reloaded(None, 200)
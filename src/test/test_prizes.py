@@ -0,0 +1,98 @@
+import base64
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.routers.auth import get_current_user, Principal
+from src.utility.database import models
+from src.utility.database.database import SessionLocal
+
+
+@pytest.fixture
+def prize_and_project():
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+    prize = models.PrizeModel(title=f'Prize {tag}', description='', reward='', sponsor='', priority=0,
+                              selectable=True)
+    project = models.ProjectModel(name=f'Project {tag}')
+    db.add_all([prize, project])
+    db.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=0, email='admin', role='admin')
+    yield prize.id, project.id
+    app.dependency_overrides.pop(get_current_user)
+
+    db.delete(project)
+    db.delete(prize)
+    db.commit()
+    db.close()
+
+
+@pytest.fixture
+def sponsored_prizes():
+    """
+    Five prizes from one sponsor, of which every other one is selectable.
+    """
+    db = SessionLocal()
+    sponsor = f'Sponsor {uuid.uuid4().hex[:8]}'
+    prizes = [models.PrizeModel(title=f'{sponsor} {i}', description='', reward='', sponsor=sponsor, priority=i,
+                                selectable=i % 2 == 0) for i in range(5)]
+    db.add_all(prizes)
+    db.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=0, email='admin', role='admin')
+    yield sponsor, [prize.id for prize in prizes]
+    app.dependency_overrides.pop(get_current_user)
+
+    for prize in prizes:
+        db.delete(prize)
+    db.commit()
+    db.close()
+
+
+def list_pages(client: TestClient, params: dict) -> list:
+    pages, cursor = [], None
+    while True:
+        response = client.get('/prizes/all', params={**params, **({'cursor': cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        pages.append([prize['id'] for prize in response.json()['items']])
+        cursor = response.json()['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_through_filtered_prizes(sponsored_prizes):
+    sponsor, ids = sponsored_prizes
+
+    with TestClient(app) as client:
+        assert list_pages(client, {'sponsor': sponsor, 'limit': 2}) == [ids[0:2], ids[2:4], ids[4:]]
+        assert list_pages(client, {'sponsor': sponsor, 'selectable': True, 'limit': 2}) == [ids[0:4:2], ids[4:]]
+        # A full last page is not followed by an empty one
+        assert list_pages(client, {'sponsor': sponsor, 'limit': 5}) == [ids]
+
+
+def test_malformed_cursor_is_rejected(sponsored_prizes):
+    cursors = ['not a cursor', base64.urlsafe_b64encode(b'[1]').decode(),
+               base64.urlsafe_b64encode(b'{"id": "1"}').decode(), base64.urlsafe_b64encode(b'{"rank": 1}').decode()]
+
+    with TestClient(app) as client:
+        for cursor in cursors:
+            assert client.get('/prizes/all', params={'cursor': cursor}).status_code == 400, cursor
+
+
+def test_assign_and_remove_winner_are_idempotent(prize_and_project):
+    prize_id, project_id = prize_and_project
+
+    with TestClient(app) as client:
+        # Removing a prize the project has not won changes nothing
+        assert client.delete(f'/prizes/{prize_id}/winner/{project_id}').status_code == 200
+
+        for _ in range(2):
+            assert client.post(f'/prizes/{prize_id}/winner/{project_id}').status_code == 200
+        for _ in range(2):
+            assert client.delete(f'/prizes/{prize_id}/winner/{project_id}').status_code == 200
+
+    with SessionLocal() as db:
+        assert db.get(models.ProjectModel, project_id).prizes_won == []
@@ -0,0 +1,97 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.main import app
+from src.routers.auth import get_current_user, Principal
+from src.utility.database import models
+from src.utility.database.database import SessionLocal, async_engine
+
+
+@pytest.fixture
+def prizes_and_project():
+    """
+    A project, and four prizes of which the third is not selectable.
+    """
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+    prizes = [models.PrizeModel(title=f'Prize {tag} {i}', description='', reward='', sponsor='', priority=i,
+                                selectable=i != 2) for i in range(4)]
+    project_fields = ['image_url', 'github_link', 'video_link', 'description', 'inspiration', 'functionality',
+                      'architecture', 'technologiesUsed', 'challengesFaced', 'lessonsLearned', 'nextSteps']
+    project = models.ProjectModel(name=f'Project {tag}', **{field: '' for field in project_fields})
+    db.add_all(prizes + [project])
+    db.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=0, email='admin', role='admin')
+    yield [prize.id for prize in prizes], project.id
+    app.dependency_overrides.pop(get_current_user)
+
+    db.delete(project)
+    for prize in prizes:
+        db.delete(prize)
+    db.commit()
+    db.close()
+
+
+def attempted_prize_ids(project_id: int) -> list:
+    with SessionLocal() as db:
+        return sorted(prize.id for prize in db.get(models.ProjectModel, project_id).prizes_attempted)
+
+
+def association_writes(statements: list) -> list:
+    table = models.prize_project_attempt_association.name
+    return [statement.split()[0] for statement in statements
+            if table in statement and not statement.lstrip().startswith('SELECT')]
+
+
+def test_attempt_prizes_writes_only_the_difference(prizes_and_project):
+    (first, second, _, fourth), project_id = prizes_and_project
+    url = f'/projects/{project_id}/attempt_prizes'
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with TestClient(app) as client:
+        assert client.post(url, json=[first, second]).status_code == 200
+        assert attempted_prize_ids(project_id) == [first, second]
+
+        event.listen(async_engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+        try:
+            # Re-saving an unchanged list writes nothing
+            assert client.post(url, json=[second, first]).status_code == 200
+            assert association_writes(statements) == []
+
+            statements.clear()
+            response = client.post(url, json=[second, fourth])
+            assert response.status_code == 200
+            assert sorted(association_writes(statements)) == ['DELETE', 'INSERT']
+        finally:
+            event.remove(async_engine.sync_engine, 'before_cursor_execute', before_cursor_execute)
+
+    assert [prize['id'] for prize in response.json()['prizes_attempted']] == [second, fourth]
+    assert attempted_prize_ids(project_id) == [second, fourth]
+
+
+def test_attempt_prizes_validates_new_prizes(prizes_and_project):
+    (first, _, unselectable, fourth), project_id = prizes_and_project
+    url = f'/projects/{project_id}/attempt_prizes'
+
+    with TestClient(app) as client:
+        assert client.post(url, json=[first, fourth]).status_code == 200
+
+        assert client.post(url, json=[first, -1]).status_code == 404
+        assert client.post(url, json=[first, unselectable]).status_code == 400
+        assert attempted_prize_ids(project_id) == [first, fourth]
+
+        # A prize attempted before it stopped being selectable is kept
+        with SessionLocal() as db:
+            db.get(models.PrizeModel, fourth).selectable = False
+            db.commit()
+        assert client.post(url, json=[first, fourth]).status_code == 200
+        assert client.post(url, json=[fourth]).status_code == 200
+
+    assert attempted_prize_ids(project_id) == [fourth]
@@ -0,0 +1,196 @@
+import uuid
+from contextlib import contextmanager
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from src.main import app
+from src.routers.auth import get_current_user, Principal
+from src.utility.database import models
+from src.utility.database.database import SessionLocal, engine, async_engine
+
+client = TestClient(app)
+
+
+@pytest.fixture(scope='module', autouse=True)
+def client_loop():
+    # Run every request on one event loop, as pooled asyncpg connections cannot be used from another
+    with client:
+        yield
+
+
+@contextmanager
+def count_queries():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    engines = [engine, async_engine.sync_engine]
+    for e in engines:
+        event.listen(e, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        for e in engines:
+            event.remove(e, 'before_cursor_execute', before_cursor_execute)
+
+
+@pytest.fixture(scope='module')
+def participant():
+    """
+    A participant with a project (attempting and winning prizes) and mentorship requests, so that every relationship
+    serialized by the User response model is populated.
+    """
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+
+    role = db.query(models.RoleModel).filter(models.RoleModel.name == 'participant').first()
+    prizes = [models.PrizeModel(title=f'Prize {tag} {i}', description='', reward='', sponsor='', priority=i,
+                                selectable=True) for i in range(3)]
+    project_fields = ['image_url', 'github_link', 'video_link', 'description', 'inspiration', 'functionality',
+                      'architecture', 'technologiesUsed', 'challengesFaced', 'lessonsLearned', 'nextSteps']
+    project = models.ProjectModel(name=f'Project {tag}', prizes_attempted=prizes[:2], prizes_won=prizes[2:],
+                                  **{field: '' for field in project_fields})
+    user = models.UserModel(email=f'budget-{tag}@email.com', first_name='Query', last_name='Budget', password='',
+                            role=role, project=project)
+    db.add(user)
+    db.flush()
+    for i in range(2):
+        db.add(models.MentorshipRequestModel(title=f'Request {i}', description='', technology_used='', image_url='',
+                                             urgency=i, participant_user_id=user.id, mentor_user_id=user.id))
+    db.commit()
+
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=user.id, email=user.email, role='admin')
+    yield user.id, role.id, user.email, project.id
+    app.dependency_overrides.pop(get_current_user)
+
+    db.query(models.MentorshipRequestModel).filter(models.MentorshipRequestModel.participant_user_id == user.id) \
+        .delete()
+    db.delete(user)
+    db.delete(project)
+    for prize in prizes:
+        db.delete(prize)
+    db.commit()
+    db.close()
+
+
+def assert_within_budget(method, url, budget, json=None):
+    with count_queries() as statements:
+        response = client.request(method, url, json=json)
+    assert response.status_code == 200, response.text
+    assert len(statements) <= budget, '\n\n'.join(statements)
+    assert f'db;desc="{len(statements)} queries"' in response.headers['server-timing']
+
+    return response
+
+
+@pytest.mark.timeout(5)
+def test_profile_query_budget(participant):
+    response = assert_within_budget('GET', '/auth/profile', 5)
+    assert len(response.json()['project']['prizes_attempted']) == 2
+    assert len(response.json()['mentorship_requests_participant']) == 2
+
+
+@pytest.mark.timeout(5)
+def test_assign_role_query_budget(participant):
+    user_id, role_id, _, _ = participant
+    # Includes the NOTIFY that invalidates the user in other workers
+    assign_user = assert_within_budget('POST', f'/roles/{role_id}/assign/{user_id}', 8)
+    assert assign_user.json()['role']['id'] == role_id
+
+
+@pytest.mark.timeout(5)
+def test_remove_user_from_project_query_budget(participant):
+    user_id, _, _, _ = participant
+    assert_within_budget('POST', f'/projects/remove_user/{user_id}', 4)
+
+
+@pytest.mark.timeout(5)
+def test_update_project_query_budget(participant):
+    _, _, _, project_id = participant
+    body = {field: 'Updated' for field in ['name', 'image_url', 'github_link', 'video_link', 'description',
+                                           'inspiration', 'functionality', 'architecture', 'technologiesUsed',
+                                           'challengesFaced', 'lessonsLearned', 'nextSteps']}
+    # UPDATE ... RETURNING, then the attempted and won prizes
+    response = assert_within_budget('PUT', f'/projects/{project_id}', 3, json=body)
+    assert response.json()['name'] == 'Updated'
+    assert len(response.json()['prizes_attempted']) == 2
+
+
+def test_update_missing_prize_not_found(participant):
+    body = {'title': 'Missing', 'description': '', 'reward': '', 'sponsor': '', 'priority': 0, 'selectable': True}
+    response = client.put('/prizes/0', json=body)
+    assert response.status_code == 404
+
+
+@pytest.mark.timeout(5)
+def test_search_projects_query_budget(participant):
+    _, _, _, project_id = participant
+    tag = uuid.uuid4().hex
+    with SessionLocal() as db:
+        db.query(models.ProjectModel).filter(models.ProjectModel.id == project_id).update({'name': f'Search {tag}'})
+        db.commit()
+
+    # Ranking and snippets for the page are computed in a single statement
+    response = assert_within_budget('GET', f'/projects/search?q={tag}', 1)
+    assert [project['id'] for project in response.json()['items']] == [project_id]
+
+
+@pytest.fixture
+def as_participant(participant):
+    user_id, _, email, _ = participant
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=user_id, email=email, role='participant')
+    yield participant
+    app.dependency_overrides[get_current_user] = lambda: Principal(id=user_id, email=email, role='admin')
+
+
+@pytest.mark.timeout(5)
+def test_participant_own_mentorship_request_query_budget(as_participant):
+    user_id, _, _, _ = as_participant
+    with SessionLocal() as db:
+        request_id = db.query(models.MentorshipRequestModel.id) \
+            .filter(models.MentorshipRequestModel.participant_user_id == user_id).first().id
+
+    # Ownership is checked by the query loading the request
+    response = assert_within_budget('GET', f'/mentorship_requests/{request_id}', 1)
+    assert response.json()['participant_user_id'] == user_id
+
+
+@pytest.mark.timeout(5)
+def test_participant_cannot_access_others_rows(as_participant):
+    db = SessionLocal()
+    project = models.ProjectModel(name='Someone else')
+    request = models.MentorshipRequestModel(title='Someone else', description='', technology_used='', image_url='',
+                                            urgency=1)
+    db.add_all([project, request])
+    db.commit()
+
+    project_body = {field: 'Taken' for field in ['name', 'image_url', 'github_link', 'video_link', 'description',
+                                                 'inspiration', 'functionality', 'architecture', 'technologiesUsed',
+                                                 'challengesFaced', 'lessonsLearned', 'nextSteps']}
+    request_body = {'title': 'Taken', 'description': '', 'technology_used': '', 'urgency': 1, 'image_url': ''}
+    attempts = [
+        ('GET', f'/projects/{project.id}', None),
+        ('PUT', f'/projects/{project.id}', project_body),
+        ('DELETE', f'/projects/{project.id}', None),
+        ('GET', f'/mentorship_requests/{request.id}', None),
+        ('PUT', f'/mentorship_requests/{request.id}', request_body),
+        ('DELETE', f'/mentorship_requests/{request.id}', None),
+    ]
+    try:
+        for method, url, json in attempts:
+            with count_queries() as statements:
+                response = client.request(method, url, json=json)
+            assert response.status_code == 401, (method, url, response.text)
+            assert len(statements) <= 1, '\n\n'.join(statements)
+
+        db.expire_all()
+        assert db.get(models.ProjectModel, project.id).name == 'Someone else'
+        assert db.get(models.MentorshipRequestModel, request.id).title == 'Someone else'
+    finally:
+        db.delete(project)
+        db.delete(request)
+        db.commit()
+        db.close()
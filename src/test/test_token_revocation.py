@@ -0,0 +1,37 @@
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from src.main import app
+from src.routers.auth import create_user_access_token, current_user_admin, Principal, TOKEN_ROLE_CLAIMS_ENABLED
+from src.utility.database import models
+from src.utility.database.database import SessionLocal
+
+
+@pytest.mark.skipif(not TOKEN_ROLE_CLAIMS_ENABLED, reason='Tokens do not carry role claims')
+@pytest.mark.timeout(10)
+def test_claims_token_rejected_after_role_deleted():
+    db = SessionLocal()
+    tag = uuid.uuid4().hex[:8]
+    role = models.RoleModel(name=f'revoked-{tag}', description='')
+    user = models.UserModel(email=f'revoked-{tag}@email.com', first_name='Revoked', last_name='Role', password='',
+                            role=role)
+    db.add(user)
+    db.commit()
+    role_id = role.id
+    headers = {'Authorization': f'Bearer {create_user_access_token(user)}'}
+
+    app.dependency_overrides[current_user_admin] = lambda: Principal(id=0, email='admin', role='admin')
+    try:
+        with TestClient(app) as client:
+            assert client.get('/auth/profile', headers=headers).status_code == 200
+            assert client.delete(f'/roles/{role_id}').status_code == 200
+            # The token still names the deleted role, but was revoked along with it
+            assert client.get('/auth/profile', headers=headers).status_code == 401
+    finally:
+        app.dependency_overrides.pop(current_user_admin)
+        db.delete(user)
+        db.query(models.RoleModel).filter(models.RoleModel.id == role_id).delete()
+        db.commit()
+        db.close()
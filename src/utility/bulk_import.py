@@ -0,0 +1,163 @@
+import asyncio
+import csv
+import itertools
+import json
+from tempfile import SpooledTemporaryFile
+from typing import Iterator, Iterable, AsyncIterator
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+from starlette.requests import Request
+
+from src.utility.database_wrappers import get_existing_emails_db, bulk_create_users_db
+from src.utility.password_hashing import hash_password_sync, get_import_executor
+from src.utility.schemas.User import UserCreate
+
+IMPORT_BATCH_SIZE = 500
+IMPORT_SPOOL_MAX_MEMORY = 8 * 1024 * 1024  # Uploads larger than this are buffered on disk instead of in memory
+
+
+async def spool_request_body(request: Request) -> SpooledTemporaryFile:
+    """
+    Copy a streamed request body into a temporary file, so that it can be parsed row by row while results are
+    streamed back to the client without holding the whole upload in memory.
+    """
+    spool = SpooledTemporaryFile(max_size=IMPORT_SPOOL_MAX_MEMORY)
+    async for chunk in request.stream():
+        spool.write(chunk)
+    spool.seek(0)
+
+    return spool
+
+
+def read_import_rows(file, content_type: str) -> Iterator[tuple]:
+    """
+    Lazily parse an uploaded CSV (with an email,first_name,last_name,password header) or NDJSON file.
+
+    :param file: Binary file object containing the upload
+    :param content_type: Content type of the upload, used to select the parser
+    :return: Iterator of (row number, row dictionary or None, error message or None)
+    """
+    if 'csv' in content_type:
+        yield from read_csv_rows(file)
+        return
+
+    # Each line is decoded on its own, so that a line that is not UTF-8 only invalidates that row
+    for row_number, line in enumerate(file, start=1):
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line.decode('utf-8'))
+        except UnicodeDecodeError:
+            yield row_number, None, 'Row is not valid UTF-8.'
+            continue
+        except ValueError:
+            yield row_number, None, 'Row is not valid JSON.'
+            continue
+        if not isinstance(row, dict):
+            yield row_number, None, 'Row must be a JSON object.'
+            continue
+        yield row_number, row, None
+
+
+def read_csv_rows(file) -> Iterator[tuple]:
+    # Quoted values may span lines, so parsing cannot resume after an undecodable or malformed row
+    # Lines are decoded as the reader asks for them, so that a decoding error is reported for the row it is in
+    reader = csv.DictReader(line.decode('utf-8') for line in file)
+    row_number = 0
+    try:
+        for row_number, row in enumerate(reader, start=1):
+            if None in row:
+                yield row_number, None, 'Row has more columns than the header.'
+                continue
+            yield row_number, row, None
+    except UnicodeDecodeError:
+        yield row_number + 1, None, 'File is not valid UTF-8, so no further rows were read.'
+    except csv.Error as e:
+        yield row_number + 1, None, f'File is not valid CSV ({e}), so no further rows were read.'
+
+
+def batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
+
+
+async def import_users(rows: Iterable[tuple], role_id: int, db: Session) -> AsyncIterator[dict]:
+    """
+    Create user accounts from parsed import rows, one batch at a time. For each batch, existing accounts are found
+    with a single query, passwords are hashed on the shared import process pool, and the new users are inserted (with
+    their role) in a single INSERT ... ON CONFLICT DO NOTHING statement.
+
+    :param rows: Parsed rows, from read_import_rows
+    :param role_id: Role to assign to every imported user
+    :param db: Database session
+    :return: Async iterator of per-row results
+    """
+    loop = asyncio.get_running_loop()
+    executor = get_import_executor()
+
+    for batch in batched(rows, IMPORT_BATCH_SIZE):
+        results = []
+        pending = {}  # email -> (row number, validated user)
+
+        for row_number, row, error in batch:
+            if error:
+                results.append({'row': row_number, 'status': 'invalid', 'detail': error})
+                continue
+            try:
+                user = UserCreate(**row)
+            except ValidationError as e:
+                results.append({'row': row_number, 'status': 'invalid', 'detail': e.errors()})
+                continue
+
+            if user.email in pending:
+                results.append({'row': row_number, 'email': user.email, 'status': 'duplicate'})
+                continue
+            pending[user.email] = (row_number, user)
+
+        existing = await run_in_threadpool(get_existing_emails_db, db, list(pending))
+        for email in existing:
+            row_number, _ = pending.pop(email)
+            results.append({'row': row_number, 'email': email, 'status': 'exists'})
+
+        hashes = await asyncio.gather(*[
+            loop.run_in_executor(executor, hash_password_sync, user.password) for _, user in pending.values()
+        ])
+
+        new_users = [
+            {
+                'email': user.email,
+                'first_name': user.first_name,
+                'last_name': user.last_name,
+                'password': password_hash,
+                'role_id': role_id,
+            }
+            for (_, user), password_hash in zip(pending.values(), hashes)
+        ]
+        created = await run_in_threadpool(bulk_create_users_db, db, new_users)
+
+        for email, (row_number, _) in pending.items():
+            if email in created:
+                results.append({'row': row_number, 'email': email, 'status': 'created', 'id': created[email]})
+            else:  # Created by another request after the existence check
+                results.append({'row': row_number, 'email': email, 'status': 'exists'})
+
+        for result in sorted(results, key=lambda r: r['row']):
+            yield result
+
+
+async def import_users_ndjson(file, content_type: str, role_id: int, db: Session) -> AsyncIterator[str]:
+    """
+    Run an import and stream its per-row results as NDJSON, followed by a summary line.
+    """
+    totals = {'created': 0, 'exists': 0, 'duplicate': 0, 'invalid': 0}
+    try:
+        async for result in import_users(read_import_rows(file, content_type), role_id, db):
+            totals[result['status']] += 1
+            yield json.dumps(result) + '\n'
+    finally:
+        file.close()
+
+    yield json.dumps({'detail': 'Import complete.', **totals}) + '\n'
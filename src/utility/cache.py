@@ -0,0 +1,83 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from src.utility.metrics import cache_requests
+
+
+class TTLCache:
+    """
+    Bounded, thread-safe LRU cache whose entries expire after a fixed time-to-live. Used to keep frequently read
+    values (such as the authenticated principal) in process memory so that hot endpoints can skip the database.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, name: Optional[str] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Named caches also report their hits and misses to /metrics
+        self._hit_metric = cache_requests.labels(name, 'hit') if name else None
+        self._miss_metric = cache_requests.labels(name, 'miss') if name else None
+
+    def get(self, key: Hashable, default: Any = None):
+        """
+        Fetch a value from the cache, counting the lookup as either a hit or a miss.
+
+        :param key: Cache key
+        :param default: Value returned if the key is missing or expired
+        :return: Cached value, or default
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                if self._miss_metric:
+                    self._miss_metric.inc()
+                return default
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            if self._hit_metric:
+                self._hit_metric.inc()
+            return entry[1]
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]):
+        """
+        Remove every entry for which predicate(key, value) is true. This scans the whole cache, so it is intended for
+        rare events such as permission changes.
+        """
+        with self._lock:
+            for key in [key for key, (_, value) in self._entries.items() if predicate(key, value)]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._entries),
+                'maxsize': self.maxsize,
+                'ttl': self.ttl,
+            }
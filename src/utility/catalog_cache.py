@@ -0,0 +1,78 @@
+import hashlib
+import threading
+from typing import Awaitable, Callable, Hashable, NamedTuple
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+from src.utility.cache import TTLCache
+from src.utility.invalidation import register_invalidation_handler
+
+CATALOG_CACHE_SIZE = 256
+CATALOG_CACHE_TTL_SECONDS = 60  # Upper bound on staleness if an invalidation from another worker is missed
+
+
+class CatalogEntry(NamedTuple):
+    body: bytes
+    etag: str
+
+
+class CatalogCache:
+    """
+    Read-through cache of serialized responses for rarely changing catalogs, such as prizes and roles. Entries are
+    keyed by a version counter, which every write to the catalog bumps, so that a response computed before a write
+    can never be served after it.
+    """
+
+    def __init__(self, name: str, maxsize: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL_SECONDS):
+        self.name = name
+        self.version = 0
+        self._entries = TTLCache(maxsize=maxsize, ttl=ttl, name=f'{name}_catalog')
+        self._lock = threading.Lock()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[bytes]]) -> CatalogEntry:
+        """
+        Return the cached response for a key, calling the loader to build it on a miss.
+
+        :param key: Cache key, derived from the request parameters
+        :param loader: Coroutine function returning the serialized JSON body
+        :return: Response body and its ETag
+        """
+        version = self.version
+        entry = self._entries.get((version, key))
+        if entry is None:
+            body = await loader()
+            entry = CatalogEntry(body, f'"{hashlib.sha1(body).hexdigest()}"')
+            self._entries.set((version, key), entry)
+
+        return entry
+
+    def bump(self):
+        """
+        Invalidate every cached response. Call this after any write that changes the catalog.
+        """
+        with self._lock:
+            self.version += 1
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        return {'version': self.version, **self._entries.stats()}
+
+
+def catalog_response(request: Request, entry: CatalogEntry) -> Response:
+    """
+    Build the response for a cached catalog entry, or an empty 304 if the client already has it. The ETag is derived
+    from the body rather than the version, so it is the same on every worker process.
+    """
+    headers = {'ETag': entry.etag, 'Cache-Control': 'private, no-cache'}
+    if entry.etag in request.headers.get('if-none-match', ''):
+        return Response(status_code=304, headers=headers)
+
+    return Response(content=entry.body, media_type='application/json', headers=headers)
+
+
+prize_catalog = CatalogCache('prizes')
+role_catalog = CatalogCache('roles')
+
+register_invalidation_handler('prize', lambda prize_id: prize_catalog.bump())
+register_invalidation_handler('role', lambda role_id: role_catalog.bump())
@@ -0,0 +1,34 @@
+from sqlalchemy.orm import joinedload, selectinload
+
+from src.utility.database import models
+
+# -------------------------------------------------------------------------------
+#
+#           Loader Options per Response Shape
+#
+#           Each tuple eagerly loads exactly the relationships serialized
+#           by the matching response model, so that serialization does not
+#           fire a lazy load per relationship (or per row). Apply them with
+#           query.options(*options) or select(...).options(*options).
+#
+# -------------------------------------------------------------------------------
+
+# Project: prizes_attempted and prizes_won
+project_load_options = (
+    selectinload(models.ProjectModel.prizes_attempted),
+    selectinload(models.ProjectModel.prizes_won),
+)
+
+# User: role, project (with its prizes) and both mentorship request lists
+user_load_options = (
+    joinedload(models.UserModel.role),
+    joinedload(models.UserModel.project).selectinload(models.ProjectModel.prizes_attempted),
+    joinedload(models.UserModel.project).selectinload(models.ProjectModel.prizes_won),
+    selectinload(models.UserModel.mentorship_requests_participant),
+    selectinload(models.UserModel.mentorship_requests_mentor),
+)
+
+# User, when only the role is needed (e.g. when issuing an access token)
+user_role_load_options = (
+    joinedload(models.UserModel.role),
+)
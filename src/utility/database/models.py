@@ -1,5 +1,6 @@
-from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Table
-from sqlalchemy.orm import relationship
+from sqlalchemy import Boolean, Column, ForeignKey, Integer, String, DateTime, Table, Index, Computed, and_
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 
 from src.utility.database.database import Base
 
@@ -8,15 +9,16 @@ class UserModel(Base):
     __tablename__ = "users"
 
     # Basic Information
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     email = Column(String, unique=True, index=True)
-    first_name = Column(String, index=True)
-    last_name = Column(String, index=True)
+    first_name = Column(String)
+    last_name = Column(String)
 
     # Authentication and Security
     password = Column(String)
     password_reset_token = Column(String)
     password_reset_token_sent_at = Column(DateTime)
+    token_version = Column(Integer, nullable=False, default=0, server_default='0')  # Incremented to revoke tokens
 
     # Permissions
     disabled = Column(Boolean, default=False)
@@ -25,7 +27,7 @@ class UserModel(Base):
 
     # Project
     project = relationship("ProjectModel", back_populates="users")
-    project_id = Column(Integer, ForeignKey("projects.id"))
+    project_id = Column(Integer, ForeignKey("projects.id"), index=True)
 
     # Mentorship Requests
     mentorship_requests_participant = relationship(
@@ -40,26 +42,27 @@ class UserModel(Base):
     )
 
 
+# The primary keys also serve lookups by project, and the prize_id indexes lookups by prize
 prize_project_winner_association = Table('prize_project_winner_association', Base.metadata,
-                                         Column('project_id', ForeignKey('projects.id')),
-                                         Column('prize_id', ForeignKey('prizes.id'))
+                                         Column('project_id', ForeignKey('projects.id'), primary_key=True),
+                                         Column('prize_id', ForeignKey('prizes.id'), primary_key=True, index=True)
                                          )
 
 prize_project_attempt_association = Table('prize_project_attempt_association', Base.metadata,
-                                          Column('project_id', ForeignKey('projects.id')),
-                                          Column('prize_id', ForeignKey('prizes.id'))
+                                          Column('project_id', ForeignKey('projects.id'), primary_key=True),
+                                          Column('prize_id', ForeignKey('prizes.id'), primary_key=True, index=True)
                                           )
 
 
 class ProjectModel(Base):
     __tablename__ = "projects"
 
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    name = Column(String)
     image_url = Column(String)
     github_link = Column(String)
     video_link = Column(String)
-    description = Column(String, index=True)
+    description = Column(String)
     inspiration = Column(String)
     functionality = Column(String)
     architecture = Column(String)
@@ -70,19 +73,37 @@ class ProjectModel(Base):
     inPersonProject = Column(Boolean, default=True)
     requiresPowerOutlet = Column(Boolean, default=False)
 
+    # Full-text search document, maintained by Postgres. Matches in the name rank highest, then the technologies and
+    # description, then the functionality and architecture. Deferred, as it is only used in WHERE and ORDER BY clauses.
+    search_vector = deferred(Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('english', coalesce(name, '')), 'A') || "
+        "setweight(to_tsvector('english', coalesce(\"technologiesUsed\", '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(description, '')), 'B') || "
+        "setweight(to_tsvector('english', coalesce(functionality, '')), 'C') || "
+        "setweight(to_tsvector('english', coalesce(architecture, '')), 'C')",
+        persisted=True
+    )))
+
     users = relationship("UserModel", back_populates='project')
     prizes_attempted = relationship('PrizeModel', secondary=prize_project_attempt_association,
                                     back_populates='attempting_projects')
     prizes_won = relationship('PrizeModel', secondary=prize_project_winner_association,
                               back_populates='winning_projects')
 
+    # Filters for keyset pagination of /projects/all, ordered by id
+    __table_args__ = (
+        Index('ix_projects_inPersonProject_id', 'inPersonProject', 'id'),
+        Index('ix_projects_requiresPowerOutlet_id', 'requiresPowerOutlet', 'id'),
+        Index('ix_projects_search_vector', 'search_vector', postgresql_using='gin'),  # /projects/search
+    )
+
 
 class RoleModel(Base):
     __tablename__ = "roles"
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)
     name = Column(String, index=True, unique=True)
-    description = Column(String, index=True)
+    description = Column(String)
 
     users = relationship("UserModel", back_populates='role')
 
@@ -90,18 +111,18 @@ class RoleModel(Base):
 class MentorshipRequestModel(Base):
     __tablename__ = "mentorship_requests"
 
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)
+    id = Column(Integer, primary_key=True)
+    title = Column(String)
     description = Column(String)
     technology_used = Column(String)
-    urgency = Column(Integer, index=True)
+    urgency = Column(Integer)
     image_url = Column(String)
 
     resolved = Column(Boolean, default=False)
 
 
     # User who made request
-    participant_user_id = Column(Integer, ForeignKey('users.id'))
+    participant_user_id = Column(Integer, ForeignKey('users.id'), index=True)
     participant_user = relationship(
         "UserModel",
         back_populates="mentorship_requests_participant",
@@ -109,21 +130,31 @@ class MentorshipRequestModel(Base):
     )
 
     # User who is helping with the request
-    mentor_user_id = Column(Integer, ForeignKey('users.id'))
+    mentor_user_id = Column(Integer, ForeignKey('users.id'))  # Indexed by ix_mentorship_requests_mentor_user_id_id
     mentor_user = relationship(
         "UserModel",
         back_populates="mentorship_requests_mentor",
         foreign_keys=[mentor_user_id]
     )
 
+    # Filters for keyset pagination of /mentorship_requests/all, ordered by id
+    __table_args__ = (
+        Index('ix_mentorship_requests_resolved_id', 'resolved', 'id'),
+        Index('ix_mentorship_requests_urgency_id', 'urgency', 'id'),
+        Index('ix_mentorship_requests_mentor_user_id_id', 'mentor_user_id', 'id'),
+        # Work queue for /mentorship_requests/claim_next, which only holds the requests waiting for a mentor
+        Index('ix_mentorship_requests_unclaimed', urgency.desc().nulls_last(), 'id',
+              postgresql_where=and_(resolved == False, mentor_user_id.is_(None))),
+    )
+
 
 class PrizeModel(Base):
     __tablename__ = "prizes"
 
-    id = Column(Integer, primary_key=True, index=True)
-    title = Column(String, index=True)  # Best Hardware Hack
-    description = Column(String, index=True)  # Create a hack using XYZ
-    reward = Column(String, index=True)  # Nintendo Switch
+    id = Column(Integer, primary_key=True)
+    title = Column(String)  # Best Hardware Hack
+    description = Column(String)  # Create a hack using XYZ
+    reward = Column(String)  # Nintendo Switch
     sponsor = Column(String, index=True, default="")  # HackathonXYZ
     priority = Column(Integer, index=True)  # Higher priority should appear first
     selectable = Column(Boolean, index=True)  # If projects can select the prize
@@ -0,0 +1,114 @@
+import asyncio
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+
+from src.utility.metrics import db_pool_wait, db_pool_checked_out, db_pool_overflow
+
+logger = logging.getLogger('dashboard.database')
+
+
+class PoolWaitStats:
+    """
+    Records how long callers waited to check a connection out of a pool.
+    """
+
+    def __init__(self):
+        self.checkouts = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.total_seconds += seconds
+            self.max_seconds = max(self.max_seconds, seconds)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'checkouts': self.checkouts,
+                'average_wait_ms': self.total_seconds / self.checkouts * 1000 if self.checkouts else 0.0,
+                'max_wait_ms': self.max_seconds * 1000,
+            }
+
+
+class TimedPoolMixin:
+    metrics_label = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+        self._wait_metric = db_pool_wait.labels(self.metrics_label)
+        self._checked_out_metric = db_pool_checked_out.labels(self.metrics_label)
+        self._overflow_metric = db_pool_overflow.labels(self.metrics_label)
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.wait_stats.record(elapsed)
+            self._wait_metric.observe(elapsed)
+            self._update_usage_metrics()
+
+    def _do_return_conn(self, conn):
+        super()._do_return_conn(conn)
+        self._update_usage_metrics()
+
+    def _update_usage_metrics(self):
+        self._checked_out_metric.set(self.checkedout())
+        self._overflow_metric.set(max(0, self.overflow()))
+
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    metrics_label = 'sync'
+
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_label = 'async'
+
+
+def pool_status(engine: Engine) -> dict:
+    """
+    Report the current usage of an engine's connection pool.
+
+    :param engine: Sync engine (use AsyncEngine.sync_engine for async engines)
+    :return: Connection counts and checkout wait times
+    """
+    pool = engine.pool
+    status = {
+        'size': pool.size(),
+        'checked_out': pool.checkedout(),
+        'idle': pool.checkedin(),
+        'overflow': max(0, pool.overflow()),
+    }
+    if isinstance(pool, TimedPoolMixin):
+        status.update(pool.wait_stats.stats())
+
+    return status
+
+
+async def log_pool_status(engines: dict, interval: float):
+    """
+    Periodically log the pool status of each engine for this worker.
+
+    :param engines: Mapping of name to sync engine
+    :param interval: Seconds between log lines
+    """
+    while True:
+        await asyncio.sleep(interval)
+        for name, engine in engines.items():
+            status = pool_status(engine)
+            logger.info(
+                "pid=%s pool=%s size=%s checked_out=%s idle=%s overflow=%s checkouts=%s avg_wait_ms=%.2f "
+                "max_wait_ms=%.2f", os.getpid(), name, status['size'], status['checked_out'], status['idle'],
+                status['overflow'], status.get('checkouts', 0), status.get('average_wait_ms', 0.0),
+                status.get('max_wait_ms', 0.0)
+            )
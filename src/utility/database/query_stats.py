@@ -0,0 +1,85 @@
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+class QueryStats:
+    """
+    Queries executed while handling a single request.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.statements = Counter()
+        self.timeline = None  # Set to a list to also record every statement, such as while profiling
+
+    def record(self, statement: str, seconds: float):
+        if self.timeline is not None:
+            self.timeline.append({
+                'start_ms': (time.perf_counter() - seconds - self.started) * 1000,
+                'duration_ms': seconds * 1000,
+                'statement': statement,
+            })
+
+        self.count += 1
+        self.total_seconds += seconds
+        if seconds >= self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+        self.statements[statement_shape(statement)] += 1
+
+    def repeated_statements(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        Find statements executed more than threshold times, which usually means a relationship is being lazily loaded
+        once per row (an N+1 query).
+
+        :param threshold: Number of executions of the same statement that is still considered normal
+        :return: (statement, count) for each repeated statement, most repeated first
+        """
+        return [(statement, count) for statement, count in self.statements.most_common() if count > threshold]
+
+    def server_timing(self) -> str:
+        return f'db;desc="{self.count} queries";dur={self.total_seconds * 1000:.2f}, ' \
+               f'db-slowest;dur={self.slowest_seconds * 1000:.2f}'
+
+
+# Set by QueryStatsMiddleware for the duration of each request. Threadpool workers running sync endpoints, and the
+# greenlets used by the async engine, inherit it.
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar('current_query_stats', default=None)
+
+
+def statement_shape(statement: str) -> str:
+    """
+    Normalize a statement so that executions differing only in the length of an expanded IN list are grouped.
+    """
+    return re.sub(r'\s+', ' ', re.sub(r'IN \([^)]*\)', 'IN (...)', statement)).strip()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context.query_start_time = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is not None and context is not None and hasattr(context, 'query_start_time'):
+        stats.record(statement, time.perf_counter() - context.query_start_time)
+
+
+def instrument_engine(engine: Engine):
+    """
+    Record every query executed by an engine in the QueryStats of the current request.
+
+    :param engine: Sync engine (use AsyncEngine.sync_engine for async engines)
+    """
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
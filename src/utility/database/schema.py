@@ -0,0 +1,84 @@
+import ast
+import logging
+import re
+from pathlib import Path
+from typing import Optional, Set
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy_utils import database_exists, create_database
+
+from src.utility.database import models  # noqa: registers the tables with Base
+from src.utility.database.database import Base
+
+logger = logging.getLogger('dashboard.database')
+
+MIGRATIONS_PATH = Path(__file__).resolve().parents[3] / 'alembic' / 'versions'
+
+REVISION_PATTERN = re.compile(r'^(revision|down_revision)\s*=\s*(.+)$', re.MULTILINE)
+
+
+def get_migration_heads(path: Path = MIGRATIONS_PATH) -> Set[str]:
+    """
+    Find the head revisions of the Alembic migrations, by reading the revision identifiers from each migration file
+    rather than importing Alembic and the migrations, which takes far longer.
+
+    :param path: Directory containing the migration files
+    :return: Revisions that no other migration revises
+    """
+    revisions, parents = set(), set()
+    for migration in path.glob('*.py'):
+        identifiers = dict(REVISION_PATTERN.findall(migration.read_text()))
+        if 'revision' not in identifiers:
+            continue
+
+        revisions.add(ast.literal_eval(identifiers['revision']))
+        down_revision = ast.literal_eval(identifiers.get('down_revision', 'None'))
+        if isinstance(down_revision, str):
+            parents.add(down_revision)
+        elif down_revision:
+            parents.update(down_revision)
+
+    return revisions - parents
+
+
+def get_database_revision(connection: Connection) -> Optional[str]:
+    if connection.execute(text("SELECT to_regclass('alembic_version')")).scalar() is None:
+        return None
+
+    return connection.execute(text("SELECT version_num FROM alembic_version")).scalar()
+
+
+def connect_creating_database(engine: Engine) -> Connection:
+    """
+    Connect to the database, creating it first if it does not exist.
+    """
+    try:
+        return engine.connect()
+    except OperationalError:
+        if database_exists(engine.url):
+            raise
+        create_database(engine.url)
+        return engine.connect()
+
+
+def ensure_schema(engine: Engine) -> bool:
+    """
+    Make sure that every table exists. If the database has been migrated to the latest Alembic revision, this only
+    checks the revision. Otherwise, any missing tables are created from the models, as for a fresh test database.
+
+    :param engine: Sync engine
+    :return: True if the tables had to be created or checked with create_all
+    """
+    with connect_creating_database(engine) as connection:
+        revision = get_database_revision(connection)
+        if revision is not None and revision in get_migration_heads():
+            return False
+
+        if revision is not None:
+            logger.warning("Database is at revision %s, which is not the latest. Run `alembic upgrade head`.",
+                           revision)
+        with connection.begin():
+            Base.metadata.create_all(bind=connection)
+        return True
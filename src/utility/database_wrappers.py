@@ -1,15 +1,68 @@
+from typing import List, Dict
+
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from src.utility.database import models
+from src.utility.repository import returned_columns
 from src.utility.schemas.User import UserCreate
 
 
-def get_user_by_id_db(db: Session, user_id: int):
-    return db.query(models.UserModel).filter(models.UserModel.id == user_id).first()
+def get_user_by_id_db(db: Session, user_id: int, options: tuple = ()):
+    return db.query(models.UserModel).options(*options).filter(models.UserModel.id == user_id).first()
+
+
+def get_user_by_email_db(db: Session, email: str, options: tuple = ()):
+    return db.query(models.UserModel).options(*options).filter(models.UserModel.email == email).first()
+
+
+async def claim_next_mentorship_request_db(db: AsyncSession, mentor_user_id: int):
+    """
+    Assign the most urgent (then oldest) unresolved request without a mentor to a mentor, in a single
+    UPDATE ... WHERE id = (SELECT ... FOR UPDATE SKIP LOCKED) RETURNING statement.
+
+    Rows being claimed by other mentors are locked, so they are skipped rather than waited on, and a row that another
+    mentor claimed after the statement started no longer matches once it is locked and is passed over too. Mentors
+    claiming at the same time therefore get different requests without blocking each other. The scan uses the partial
+    index ix_mentorship_requests_unclaimed, which only holds unclaimed requests.
+
+    :param db: Database session, which must be committed to release the claimed row
+    :param mentor_user_id: Id of the mentor claiming a request
+    :return: Claimed request, or None if no request is waiting for a mentor
+    """
+    requests = models.MentorshipRequestModel
+    next_request = select(requests.id) \
+        .where(requests.resolved == False, requests.mentor_user_id.is_(None)) \
+        .order_by(requests.urgency.desc().nulls_last(), requests.id) \
+        .limit(1) \
+        .with_for_update(skip_locked=True) \
+        .scalar_subquery()
+    statement = update(requests).where(requests.id == next_request).values(mentor_user_id=mentor_user_id) \
+        .returning(*returned_columns(requests))
+
+    return (await db.execute(
+        select(requests).from_statement(statement).execution_options(populate_existing=True)
+    )).scalar_one_or_none()
+
+
+def get_principal_by_email_db(db: Session, email: str):
+    """
+    Load only the columns needed for authorization (id, email, disabled flag and role name) in a single query,
+    rather than loading the full user and then lazily loading their role.
+    """
+    return db.query(
+        models.UserModel.id,
+        models.UserModel.email,
+        models.UserModel.disabled,
+        models.RoleModel.name.label('role'),
+    ).outerjoin(models.RoleModel, models.UserModel.role_id == models.RoleModel.id) \
+        .filter(models.UserModel.email == email).first()
 
 
-def get_user_by_email_db(db: Session, email: str):
-    return db.query(models.UserModel).filter(models.UserModel.email == email).first()
+def get_token_version_db(db: Session, user_id: int):
+    return db.query(models.UserModel.token_version).filter(models.UserModel.id == user_id).scalar()
 
 
 def create_user_db(db: Session, user: UserCreate):
@@ -19,3 +72,31 @@ def create_user_db(db: Session, user: UserCreate):
     db.refresh(db_user)
 
     return db_user
+
+
+def get_existing_emails_db(db: Session, emails: List[str]):
+    if not emails:
+        return set()
+
+    rows = db.query(models.UserModel.email).filter(models.UserModel.email.in_(emails)).all()
+    return {row.email for row in rows}
+
+
+def bulk_create_users_db(db: Session, users: List[dict]) -> Dict[str, int]:
+    """
+    Insert many users in a single statement, skipping any whose email address is already taken.
+
+    :param db: Database session
+    :param users: Column values for each new user, with the password already hashed
+    :return: Mapping of email address to id for each user that was created
+    """
+    if not users:
+        return {}
+
+    table = models.UserModel.__table__
+    statement = insert(table).values(users).on_conflict_do_nothing(index_elements=[table.c.email]) \
+        .returning(table.c.id, table.c.email)
+    created = {row.email: row.id for row in db.execute(statement)}
+    db.commit()
+
+    return created
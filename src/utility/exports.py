@@ -0,0 +1,82 @@
+import csv
+import io
+from typing import AsyncIterator, Dict, List
+
+from sqlalchemy import select, Table
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.utility.database import models
+from src.utility.schemas.Prize import Prize
+from src.utility.schemas.Project import Project, ProjectBase
+
+EXPORT_BATCH_SIZE = 500
+
+PROJECT_CSV_COLUMNS = ['id', *ProjectBase.__fields__.keys(), 'prizes_attempted', 'prizes_won']
+
+
+async def load_prizes_for_projects(db: AsyncSession, association: Table, project_ids: List[int]) \
+        -> Dict[int, List[Prize]]:
+    """
+    Load the prizes linked to a batch of projects through an association table, in a single query.
+
+    :param db: Database session
+    :param association: prize_project_attempt_association or prize_project_winner_association
+    :param project_ids: Projects in the batch
+    :return: Mapping of project id to its prizes
+    """
+    prizes = models.PrizeModel.__table__
+    statement = select(association.c.project_id, prizes) \
+        .join(prizes, prizes.c.id == association.c.prize_id) \
+        .where(association.c.project_id.in_(project_ids)) \
+        .order_by(prizes.c.priority.desc(), prizes.c.id)
+
+    prizes_by_project = {}
+    for row in await db.execute(statement):
+        prize = dict(row._mapping)
+        project_id = prize.pop('project_id')
+        prizes_by_project.setdefault(project_id, []).append(Prize(**prize))
+
+    return prizes_by_project
+
+
+async def stream_projects(db: AsyncSession) -> AsyncIterator[Project]:
+    """
+    Stream every project with its attempted and won prizes. Projects are read through a server-side cursor in
+    batches of EXPORT_BATCH_SIZE, and prize associations are loaded per batch, so memory use does not grow with the
+    number of projects.
+    """
+    projects = models.ProjectModel.__table__
+    columns = [projects.c[name] for name in ['id', *ProjectBase.__fields__]]
+    result = await db.stream(select(*columns).order_by(projects.c.id))
+
+    async for rows in result.partitions(EXPORT_BATCH_SIZE):
+        project_ids = [row.id for row in rows]
+        attempted = await load_prizes_for_projects(db, models.prize_project_attempt_association, project_ids)
+        won = await load_prizes_for_projects(db, models.prize_project_winner_association, project_ids)
+
+        for row in rows:
+            yield Project(**row._mapping, prizes_attempted=attempted.get(row.id, []), prizes_won=won.get(row.id, []))
+
+
+async def export_projects_ndjson(db: AsyncSession) -> AsyncIterator[str]:
+    async for project in stream_projects(db):
+        yield project.json() + '\n'
+
+
+async def export_projects_csv(db: AsyncSession) -> AsyncIterator[str]:
+    """
+    Export projects as CSV. Prize lists are flattened into a single column of prize titles separated by semicolons.
+    """
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=PROJECT_CSV_COLUMNS)
+
+    writer.writeheader()
+    async for project in stream_projects(db):
+        row = project.dict()
+        row['prizes_attempted'] = '; '.join(prize.title for prize in project.prizes_attempted)
+        row['prizes_won'] = '; '.join(prize.title for prize in project.prizes_won)
+        writer.writerow(row)
+
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
@@ -0,0 +1,94 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional
+
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+INVALIDATION_CHANNEL = 'dashboard_invalidate'
+INVALIDATION_RECONNECT_SECONDS = 1
+INVALIDATION_MAX_RECONNECT_SECONDS = 30
+
+logger = logging.getLogger('dashboard.invalidation')
+
+# entity -> functions that evict that entity from this worker's caches. Each is called with the id from the
+# notification, or with None when every entry may be stale (such as after the listener reconnects).
+invalidation_handlers: Dict[str, List[Callable[[Optional[str]], None]]] = {}
+
+notify_statement = text("SELECT pg_notify(:channel, :payload)")
+
+
+def register_invalidation_handler(entity: str, handler: Callable[[Optional[str]], None]):
+    invalidation_handlers.setdefault(entity, []).append(handler)
+
+
+def invalidate_local(entity: str, identifier: Optional[str]):
+    for handler in invalidation_handlers.get(entity, []):
+        handler(identifier)
+
+
+def invalidate_all_local():
+    for entity in invalidation_handlers:
+        invalidate_local(entity, None)
+
+
+def publish_invalidation(db: Session, entity: str, identifier):
+    """
+    Tell every worker to evict an entity from its caches. The notification is sent by Postgres when the current
+    transaction commits, and is discarded if it rolls back, so this must be called before db.commit(). The calling
+    worker should still update its own caches after committing, rather than waiting for the notification.
+
+    :param db: Database session with the transaction making the change
+    :param entity: Kind of entity that changed (user, role, prize or mentorship_request)
+    :param identifier: Id of the entity that changed
+    """
+    db.execute(notify_statement, {'channel': INVALIDATION_CHANNEL, 'payload': f'{entity}:{identifier}'})
+
+
+async def publish_invalidation_async(db: AsyncSession, entity: str, identifier):
+    await db.execute(notify_statement, {'channel': INVALIDATION_CHANNEL, 'payload': f'{entity}:{identifier}'})
+
+
+def handle_notification(connection, pid: int, channel: str, payload: str):
+    entity, _, identifier = payload.partition(':')
+    invalidate_local(entity, identifier or None)
+
+
+async def listen_for_invalidations(dsn: str):
+    """
+    Evict cache entries in this worker whenever another worker publishes an invalidation. Runs for the lifetime of
+    the worker on its own connection, outside the connection pools, and reconnects if the connection is lost. Since
+    notifications sent while disconnected are missed, every cache is cleared after reconnecting.
+
+    :param dsn: Postgres connection string
+    """
+    delay = INVALIDATION_RECONNECT_SECONDS
+    connected_before = False
+
+    while True:
+        try:
+            connection = await asyncpg.connect(dsn)
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("Unable to connect invalidation listener, retrying in %ss: %s", delay, e)
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, INVALIDATION_MAX_RECONNECT_SECONDS)
+            continue
+
+        closed = asyncio.Event()
+        connection.add_termination_listener(lambda _: closed.set())
+        try:
+            await connection.add_listener(INVALIDATION_CHANNEL, handle_notification)
+            if connected_before:
+                invalidate_all_local()
+            connected_before = True
+            delay = INVALIDATION_RECONNECT_SECONDS
+
+            await closed.wait()
+            logger.warning("Invalidation listener connection lost, reconnecting")
+        except (OSError, asyncpg.PostgresError) as e:
+            logger.warning("Invalidation listener failed, reconnecting: %s", e)
+        finally:
+            if not connection.is_closed():
+                await connection.close()
@@ -0,0 +1,264 @@
+import asyncio
+import logging
+import uuid
+from collections import deque
+from typing import AsyncIterator, Awaitable, Deque, List, Optional, Set, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from src.utility.database import models
+from src.utility.database.database import AsyncSessionLocal
+from src.utility.invalidation import register_invalidation_handler, publish_invalidation, publish_invalidation_async
+from src.utility.metrics import mentorship_stream_subscribers
+from src.utility.schemas.MentorshipRequest import MentorshipRequest
+
+MENTORSHIP_REQUEST_ENTITY = 'mentorship_request'
+STREAM_BUFFER_SIZE = 1000  # Recent events kept by each worker, so that reconnecting clients can resume
+SUBSCRIBER_QUEUE_SIZE = 200  # Events a client may fall behind by before it is disconnected
+STREAM_KEEPALIVE_SECONDS = 15
+STREAM_RETRY_MILLISECONDS = 2000
+
+logger = logging.getLogger('dashboard.mentorship_stream')
+
+
+def change_identifier(mentorship_request_id: int, action: str) -> str:
+    # The event id is chosen by the publisher, so that it is the same on every worker and a client can resume on any
+    return f'{mentorship_request_id}:{action}:{uuid.uuid4().hex[:16]}'
+
+
+def publish_mentorship_request_change(db: Session, mentorship_request_id: int, action: str):
+    """
+    Send a change to the clients of every worker's mentorship request stream once the current transaction commits.
+    Like publish_invalidation, this must be called before db.commit().
+
+    :param db: Database session with the transaction making the change
+    :param mentorship_request_id: Id of the request that changed
+    :param action: Event type sent to clients: created, updated, claimed, resolved or deleted. The request is loaded
+        when the event is sent, and an event for a request that no longer exists is sent as deleted.
+    """
+    publish_invalidation(db, MENTORSHIP_REQUEST_ENTITY, change_identifier(mentorship_request_id, action))
+
+
+async def publish_mentorship_request_change_async(db: AsyncSession, mentorship_request_id: int, action: str):
+    await publish_invalidation_async(db, MENTORSHIP_REQUEST_ENTITY,
+                                     change_identifier(mentorship_request_id, action))
+
+
+def format_event(event: str, data: str, event_id: Optional[str] = None) -> bytes:
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines += [f'event: {event}', f'data: {data}']
+    return ('\n'.join(lines) + '\n\n').encode()
+
+
+class Subscription:
+    """
+    Events waiting to be sent to one connected client. A client that falls SUBSCRIBER_QUEUE_SIZE events behind is
+    closed rather than buffered without limit, and resumes from the last event it received when it reconnects.
+    """
+
+    def __init__(self):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.closed = False
+
+    def send(self, message: Optional[bytes]) -> bool:
+        try:
+            self.queue.put_nowait(message)
+            return True
+        except asyncio.QueueFull:
+            return False
+
+    def close(self):
+        self.closed = True
+        self.send(None)  # Wake the client if it is waiting. A full queue will be drained before it notices instead.
+
+
+class MentorshipRequestBroadcaster:
+    """
+    Fans changes to mentorship requests out to every client of this worker's event stream.
+
+    Changes arrive over the worker's invalidation listener, so there is a single database subscription per worker
+    however many clients are connected. Each batch of changes is loaded with one query and serialized once, and the
+    same bytes are queued for every client. The last STREAM_BUFFER_SIZE events are kept so that a reconnecting client
+    can be sent the events it missed instead of a new snapshot, and clients connecting between two events share one
+    snapshot, so that every client reconnecting at once (such as after a deploy) does not load its own.
+    """
+
+    def __init__(self):
+        self.subscribers: Set[Subscription] = set()
+        self.events: Deque[Tuple[str, bytes]] = deque(maxlen=STREAM_BUFFER_SIZE)
+        self.changes: Optional[asyncio.Queue] = None
+        # Bumped for every event sent, so that a snapshot is only shared by clients that subscribed before the next one
+        self.version = 0
+        self.snapshot: Optional[Tuple[int, asyncio.Future]] = None
+
+    def handle_change(self, identifier: Optional[str]):
+        """
+        Invalidation handler for mentorship requests. Called with None when changes may have been missed, in which case
+        every client is disconnected, and sent a new snapshot when it reconnects.
+        """
+        if identifier is None:
+            self.reset()
+            return
+
+        mentorship_request_id, action, event_id = identifier.split(':')
+        if self.changes is not None:
+            self.changes.put_nowait((int(mentorship_request_id), action, event_id))
+
+    def reset(self):
+        self.version += 1
+        self.events.clear()
+        for subscription in self.subscribers:
+            subscription.close()
+        self.subscribers.clear()
+        mentorship_stream_subscribers.set(0)
+
+    async def run(self):
+        """
+        Load and send changes as they arrive. Runs for the lifetime of the worker, alongside the invalidation listener.
+        """
+        self.changes = asyncio.Queue()
+        try:
+            while True:
+                changes = [await self.changes.get()]
+                while not self.changes.empty():
+                    changes.append(self.changes.get_nowait())
+
+                # Without clients there is no one to send to, and loading the changes would only serve a resume
+                if not self.subscribers:
+                    self.events.clear()
+                    continue
+
+                try:
+                    messages = await self.load_changes(changes)
+                except (OSError, SQLAlchemyError) as e:
+                    logger.warning("Unable to load mentorship request changes, disconnecting clients: %s", e)
+                    self.reset()
+                    continue
+
+                for event_id, message in messages:
+                    self.broadcast(event_id, message)
+        finally:
+            self.changes = None
+
+    async def load_changes(self, changes: List[Tuple[int, str, str]]) -> List[Tuple[str, bytes]]:
+        ids = {mentorship_request_id for mentorship_request_id, _, _ in changes}
+        async with AsyncSessionLocal() as db:
+            rows = {
+                row.id: MentorshipRequest.from_orm(row).json()
+                for row in await db.scalars(
+                    select(models.MentorshipRequestModel).where(models.MentorshipRequestModel.id.in_(ids))
+                )
+            }
+
+        messages = []
+        for mentorship_request_id, action, event_id in changes:
+            if mentorship_request_id in rows:
+                message = format_event(action, rows[mentorship_request_id], event_id)
+            else:
+                message = format_event('deleted', f'{{"id": {mentorship_request_id}}}', event_id)
+            messages.append((event_id, message))
+
+        return messages
+
+    def broadcast(self, event_id: str, message: bytes):
+        self.version += 1
+        self.events.append((event_id, message))
+        for subscription in list(self.subscribers):
+            if not subscription.send(message):
+                logger.info("Disconnecting mentorship request stream client that fell behind")
+                self.unsubscribe(subscription)
+                subscription.close()
+
+    def subscribe(self, last_event_id: Optional[str]) -> Tuple[Subscription, Optional[List[bytes]]]:
+        """
+        Start queueing events for a client.
+
+        :param last_event_id: Id of the last event the client received, if it is reconnecting
+        :return: The subscription, and the buffered events after last_event_id, or None if the client needs a snapshot
+        """
+        replay = None
+        if last_event_id is not None:
+            event_ids = [event_id for event_id, _ in self.events]
+            if last_event_id in event_ids:
+                replay = [message for _, message in list(self.events)[event_ids.index(last_event_id) + 1:]]
+
+        subscription = Subscription()
+        self.subscribers.add(subscription)
+        mentorship_stream_subscribers.inc()
+
+        return subscription, replay
+
+    def load_snapshot(self) -> Awaitable[bytes]:
+        """
+        Snapshot event for a client that has just subscribed. Any change missing from a snapshot that started loading
+        before the client subscribed was sent after the snapshot started, so it is only shared while no event has been
+        sent since.
+        """
+        if self.snapshot is None or self.snapshot[0] != self.version or \
+                (self.snapshot[1].done() and self.snapshot[1].exception() is not None):
+            event_id = self.events[-1][0] if self.events else None
+            self.snapshot = (self.version, asyncio.ensure_future(load_snapshot(event_id)))
+
+        return asyncio.shield(self.snapshot[1])
+
+    def unsubscribe(self, subscription: Subscription):
+        if subscription in self.subscribers:
+            self.subscribers.remove(subscription)
+            mentorship_stream_subscribers.dec()
+
+    async def stream(self, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Server-sent events for one client: a snapshot event with the unresolved requests in the order they are claimed
+        (or the events missed since last_event_id), then an event for each change. Events carry the whole request,
+        except for deleted events, which only carry its id.
+
+        :param last_event_id: Last-Event-ID sent by a reconnecting client
+        """
+        subscription, replay = self.subscribe(last_event_id)
+        snapshot = self.load_snapshot() if replay is None else None
+        try:
+            yield f'retry: {STREAM_RETRY_MILLISECONDS}\n\n'.encode()
+
+            if snapshot is not None:
+                # No change can fall between the snapshot and the first event, but a change already included in the
+                # snapshot may be sent again, which clients apply as an upsert
+                yield await snapshot
+            else:
+                for message in replay:
+                    yield message
+
+            while True:
+                try:
+                    message = await asyncio.wait_for(subscription.queue.get(), STREAM_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield b': keepalive\n\n'
+                    continue
+
+                if message is None:
+                    return
+                yield message
+                if subscription.closed and subscription.queue.empty():
+                    return
+        finally:
+            self.unsubscribe(subscription)
+
+
+async def load_snapshot(event_id: Optional[str]) -> bytes:
+    requests = models.MentorshipRequestModel
+    async with AsyncSessionLocal() as db:
+        rows = (await db.scalars(
+            select(requests).where(requests.resolved == False)
+            .order_by(requests.urgency.desc().nulls_last(), requests.id)
+        )).all()
+
+    data = '[' + ','.join(MentorshipRequest.from_orm(row).json() for row in rows) + ']'
+
+    return format_event('snapshot', data, event_id)
+
+
+mentorship_request_broadcaster = MentorshipRequestBroadcaster()
+
+register_invalidation_handler(MENTORSHIP_REQUEST_ENTITY, mentorship_request_broadcaster.handle_change)
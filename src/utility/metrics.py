@@ -0,0 +1,71 @@
+import os
+
+from prometheus_client import Counter, Gauge, Histogram, CollectorRegistry, REGISTRY, generate_latest, \
+    CONTENT_TYPE_LATEST
+from prometheus_client import multiprocess
+from starlette.responses import Response
+
+# Metrics are recorded in each worker process. When PROMETHEUS_MULTIPROC_DIR is set (as it must be when running
+# several gunicorn workers), each worker writes its values to memory mapped files in that directory, and a scrape of
+# /metrics on any worker aggregates every worker's files.
+MULTIPROCESS = 'PROMETHEUS_MULTIPROC_DIR' in os.environ
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+http_request_duration = Histogram(
+    'dashboard_http_request_duration_seconds', 'Time to handle a request, by route template.',
+    ['method', 'route', 'status'], buckets=LATENCY_BUCKETS
+)
+http_requests_in_progress = Gauge(
+    'dashboard_http_requests_in_progress', 'Requests currently being handled.',
+    ['method'], multiprocess_mode='livesum'
+)
+
+db_pool_checked_out = Gauge(
+    'dashboard_db_pool_checked_out_connections', 'Connections currently checked out of the pool.',
+    ['engine'], multiprocess_mode='livesum'
+)
+db_pool_overflow = Gauge(
+    'dashboard_db_pool_overflow_connections', 'Connections open beyond the pool size.',
+    ['engine'], multiprocess_mode='livesum'
+)
+db_pool_wait = Histogram(
+    'dashboard_db_pool_wait_seconds', 'Time spent waiting to check a connection out of the pool.',
+    ['engine'], buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 30)
+)
+
+password_hash_duration = Histogram(
+    'dashboard_password_hash_seconds', 'Time to hash or verify a password, including time queued for the executor.',
+    ['operation'], buckets=(0.05, 0.1, 0.25, 0.5, 1, 2, 5, 10)
+)
+password_hash_rejected = Counter(
+    'dashboard_password_hash_rejected', 'Password hashing requests rejected because the queue was full.'
+)
+
+cache_requests = Counter(
+    'dashboard_cache_requests', 'In-process cache lookups, by cache and result (hit or miss).',
+    ['cache', 'result']
+)
+
+mentorship_stream_subscribers = Gauge(
+    'dashboard_mentorship_stream_subscribers', 'Clients connected to the mentorship request event stream.',
+    multiprocess_mode='livesum'
+)
+
+exceptions_handled = Counter(
+    'dashboard_exceptions_handled', 'Exceptions converted to error responses by the application exception handlers.',
+    ['exception']
+)
+
+
+def metrics_response() -> Response:
+    """
+    Render every metric in the Prometheus text format, aggregated across workers in multiprocess mode.
+    """
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+
+    return Response(generate_latest(registry), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,105 @@
+import logging
+import time
+
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+
+from src.utility.database.query_stats import QueryStats, current_query_stats
+from src.utility.metrics import http_request_duration, http_requests_in_progress
+
+logger = logging.getLogger('dashboard.sql')
+
+LOG_STATEMENT_MAX_LENGTH = 300
+
+
+class QueryStatsMiddleware:
+    """
+    Count the queries made while handling each request, and report them in a Server-Timing header and a log line.
+    Queries made by a streaming response after its headers are sent are included in the log line only.
+
+    :param app: ASGI application
+    :param repeat_threshold: If positive, warn when one statement runs more than this many times in a request
+    """
+
+    def __init__(self, app: ASGIApp, repeat_threshold: int = 0):
+        self.app = app
+        self.repeat_threshold = repeat_threshold
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_server_timing(message: Message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                server_timing = f'{stats.server_timing()}, app;dur={(time.perf_counter() - start) * 1000:.2f}'
+                message['headers'] = [*message.get('headers', []), (b'server-timing', server_timing.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_server_timing)
+        finally:
+            current_query_stats.reset(token)
+            self.log_request(scope, status_code, stats, time.perf_counter() - start)
+
+    def log_request(self, scope: Scope, status_code: int, stats: QueryStats, seconds: float):
+        logger.info(
+            "method=%s path=%s status=%s queries=%s db_ms=%.2f slowest_ms=%.2f total_ms=%.2f slowest=%r",
+            scope['method'], scope['path'], status_code, stats.count, stats.total_seconds * 1000,
+            stats.slowest_seconds * 1000, seconds * 1000,
+            ' '.join(stats.slowest_statement.split())[:LOG_STATEMENT_MAX_LENGTH] if stats.slowest_statement else None
+        )
+
+        if self.repeat_threshold > 0:
+            for statement, count in stats.repeated_statements(self.repeat_threshold):
+                logger.warning("Possible N+1 query: method=%s path=%s executions=%s statement=%r",
+                               scope['method'], scope['path'], count, statement[:LOG_STATEMENT_MAX_LENGTH])
+
+
+class MetricsMiddleware:
+    """
+    Record the latency of each request in a histogram labelled by its route template (such as /prizes/{prize_id}),
+    so that the number of label values stays bounded, and track the number of requests in progress.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.route_templates = None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        in_progress = http_requests_in_progress.labels(scope['method'])
+        in_progress.inc()
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_with_status(message: Message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            in_progress.dec()
+            http_request_duration.labels(scope['method'], self.route_template(scope), status_code) \
+                .observe(time.perf_counter() - start)
+
+    def route_template(self, scope: Scope) -> str:
+        # The router stores the matched endpoint in the scope, and every endpoint belongs to a single route
+        if self.route_templates is None:
+            self.route_templates = {
+                route.endpoint: route.path for route in scope['app'].routes if hasattr(route, 'endpoint')
+            }
+
+        return self.route_templates.get(scope.get('endpoint'), '<unmatched>')
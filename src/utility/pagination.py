@@ -0,0 +1,108 @@
+import base64
+import binascii
+import json
+from typing import Optional, Tuple
+
+from fastapi import Query
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+from src.utility.responses import InvalidCursorException
+
+DEFAULT_PAGE_SIZE = 100
+DEFAULT_RANKED_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 500
+
+
+class PageParams(BaseModel):
+    limit: int
+    after_id: Optional[int] = None
+
+
+class RankedPageParams(BaseModel):
+    limit: int
+    after_rank: Optional[float] = None
+    after_id: Optional[int] = None
+
+
+def encode_cursor(last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'id': last_id}).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        last_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))['id']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursorException()
+
+    if not isinstance(last_id, int):
+        raise InvalidCursorException()
+
+    return last_id
+
+
+def encode_ranked_cursor(rank: float, last_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({'rank': rank, 'id': last_id}).encode()).decode()
+
+
+def decode_ranked_cursor(cursor: str) -> Tuple[float, int]:
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        rank, last_id = position['rank'], position['id']
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursorException()
+
+    if not isinstance(rank, (int, float)) or not isinstance(last_id, int):
+        raise InvalidCursorException()
+
+    return float(rank), last_id
+
+
+def page_params(
+        limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None
+) -> PageParams:
+    """
+    Dependency parsing the limit and opaque cursor query parameters shared by all listing endpoints.
+    """
+    return PageParams(limit=limit, after_id=decode_cursor(cursor) if cursor else None)
+
+
+def ranked_page_params(
+        limit: int = Query(DEFAULT_RANKED_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+        cursor: Optional[str] = None
+) -> RankedPageParams:
+    """
+    Dependency parsing the limit and cursor of listings ordered by relevance, such as search results, where the cursor
+    holds the rank and id of the last result on the previous page.
+    """
+    if not cursor:
+        return RankedPageParams(limit=limit)
+
+    after_rank, after_id = decode_ranked_cursor(cursor)
+    return RankedPageParams(limit=limit, after_rank=after_rank, after_id=after_id)
+
+
+async def paginate(db: AsyncSession, statement: Select, model, params: PageParams) -> dict:
+    """
+    Fetch one page of results using keyset pagination on the model's id, so that each page costs an index range scan
+    no matter how deep into the table it is.
+
+    :param db: Database session
+    :param statement: Select statement for the model, with any filters and loader options applied
+    :param model: Model being listed, which must have an integer id primary key
+    :param params: Page size and position, from page_params
+    :return: Dictionary matching the Page schema
+    """
+    if params.after_id is not None:
+        statement = statement.where(model.id > params.after_id)
+
+    rows = (await db.scalars(statement.order_by(model.id).limit(params.limit + 1))).all()
+
+    next_cursor = None
+    if len(rows) > params.limit:
+        rows = rows[:params.limit]
+        next_cursor = encode_cursor(rows[-1].id)
+
+    return {'items': rows, 'next_cursor': next_cursor}
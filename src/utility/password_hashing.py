@@ -0,0 +1,154 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from src.utility.metrics import password_hash_duration, password_hash_rejected
+from src.utility.responses import PasswordHashingBusyException
+from src.utility.settings import settings
+
+# bcrypt is deliberately slow, so it is run on a dedicated, size-limited executor rather than the shared threadpool
+# that serves sync endpoints. Requests beyond the worker count wait in a bounded queue, and are rejected with a 503
+# once that queue is full.
+BCRYPT_ROUNDS = settings.bcrypt_rounds
+PASSWORD_HASH_WORKERS = settings.password_hash_workers
+PASSWORD_HASH_MAX_QUEUE = settings.password_hash_max_queue
+PASSWORD_HASH_USE_PROCESSES = settings.password_hash_use_processes
+PASSWORD_HASH_RETRY_AFTER_SECONDS = 2
+
+# Bulk imports hash on their own process pool, sized to leave CPU for interactive logins
+PASSWORD_IMPORT_WORKERS = settings.password_import_workers
+
+_import_executor = None
+_import_executor_lock = threading.Lock()
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
+
+
+def hash_password_sync(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def verify_password_sync(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Check if a stored hash was created with a different bcrypt cost than the one currently configured.
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+def get_import_executor() -> ProcessPoolExecutor:
+    """
+    Process pool shared by every bulk import in this worker. Created on first use and kept for the lifetime of the
+    worker, rather than started (and waited on to stop) by each import.
+    """
+    global _import_executor
+    with _import_executor_lock:
+        if _import_executor is None:
+            _import_executor = ProcessPoolExecutor(max_workers=PASSWORD_IMPORT_WORKERS)
+        return _import_executor
+
+
+def shutdown_import_executor():
+    global _import_executor
+    with _import_executor_lock:
+        if _import_executor is not None:
+            _import_executor.shutdown(wait=False)
+            _import_executor = None
+
+
+class PasswordHasher:
+    """
+    Runs password hashing and verification on a dedicated executor with admission control, and records queue depth
+    and latency metrics.
+    """
+
+    def __init__(self, workers: int, max_queue: int, use_processes: bool = False):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.use_processes = use_processes
+
+        self.pending = 0
+        self.rejected = 0
+        self.completed = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> Executor:
+        # Created on first use, so that importing the application does not spawn worker processes
+        with self._lock:
+            if self._executor is None:
+                if self.use_processes:
+                    self._executor = ProcessPoolExecutor(max_workers=self.workers)
+                else:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='bcrypt')
+            return self._executor
+
+    async def run(self, fn, *args):
+        """
+        Run a hashing function on the executor, or raise PasswordHashingBusyException if the wait queue is full.
+
+        :param fn: Module level hashing function to run (must be picklable when using processes)
+        :param args: Arguments for fn
+        :return: Result of fn
+        """
+        with self._lock:
+            if self.pending >= self.workers + self.max_queue:
+                self.rejected += 1
+                password_hash_rejected.inc()
+                raise PasswordHashingBusyException()
+            self.pending += 1
+
+        start = time.perf_counter()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self.pending -= 1
+                self.completed += 1
+                self.total_seconds += elapsed
+                self.max_seconds = max(self.max_seconds, elapsed)
+            password_hash_duration.labels(fn.__name__.replace('_password_sync', '')).observe(elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self.run(hash_password_sync, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self.run(verify_password_sync, plain_password, hashed_password)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'workers': self.workers,
+                'executor': 'process' if self.use_processes else 'thread',
+                'bcrypt_rounds': BCRYPT_ROUNDS,
+                'in_flight': min(self.pending, self.workers),
+                'queue_depth': max(0, self.pending - self.workers),
+                'max_queue': self.max_queue,
+                'rejected': self.rejected,
+                'completed': self.completed,
+                'average_seconds': self.total_seconds / self.completed if self.completed else 0.0,
+                'max_seconds': self.max_seconds,
+            }
+
+
+password_hasher = PasswordHasher(
+    workers=PASSWORD_HASH_WORKERS,
+    max_queue=PASSWORD_HASH_MAX_QUEUE,
+    use_processes=PASSWORD_HASH_USE_PROCESSES,
+)
@@ -0,0 +1,130 @@
+import datetime
+import threading
+import time
+import uuid
+from collections import deque
+from typing import Awaitable, Callable, List, Optional
+
+from pyinstrument import Profiler
+from pyinstrument.renderers import HTMLRenderer, ConsoleRenderer
+from starlette.datastructures import QueryParams
+from starlette.requests import Request
+from starlette.types import ASGIApp, Receive, Scope, Send, Message
+
+from src.utility.database.query_stats import current_query_stats
+
+PROFILE_HEADER = b'x-profile'
+PROFILE_QUERY_FLAG = 'profile'
+PROFILE_BUFFER_SIZE = 20  # Older profiles are discarded once this many have been captured, per worker
+PROFILE_SAMPLE_INTERVAL_SECONDS = 0.001
+
+
+class ProfileBuffer:
+    """
+    Bounded, thread-safe ring buffer of the most recently captured request profiles.
+    """
+
+    def __init__(self, maxsize: int = PROFILE_BUFFER_SIZE):
+        self._profiles = deque(maxlen=maxsize)
+        self._lock = threading.Lock()
+
+    def add(self, profile: dict):
+        with self._lock:
+            self._profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[dict]:
+        with self._lock:
+            return next((profile for profile in self._profiles if profile['id'] == profile_id), None)
+
+    def list(self) -> List[dict]:
+        with self._lock:
+            return [summarize_profile(profile) for profile in reversed(self._profiles)]
+
+
+def summarize_profile(profile: dict) -> dict:
+    return {key: value for key, value in profile.items() if key not in ('session', 'sql_timeline')}
+
+
+def render_profile(profile: dict, output: str) -> str:
+    """
+    Render a captured profile as an interactive HTML call tree, or as plain text followed by the SQL timeline.
+    """
+    if output == 'html':
+        return HTMLRenderer().render(profile['session'])
+
+    lines = [ConsoleRenderer(unicode=True, color=False, show_all=False).render(profile['session']), 'SQL timeline:']
+    for query in profile['sql_timeline']:
+        statement = ' '.join(query['statement'].split())
+        lines.append(f"{query['start_ms']:>10.2f}ms {query['duration_ms']:>9.2f}ms  {statement}")
+
+    return '\n'.join(lines)
+
+
+def profiling_requested(scope: Scope) -> bool:
+    if any(name == PROFILE_HEADER for name, _ in scope['headers']):
+        return True
+
+    return PROFILE_QUERY_FLAG.encode() in scope['query_string'] and \
+        QueryParams(scope['query_string']).get(PROFILE_QUERY_FLAG) not in (None, '0', 'false')
+
+
+class ProfilingMiddleware:
+    """
+    Capture a sampling profile and SQL timeline of a request when an admin asks for one, by sending an X-Profile
+    header or a profile=1 query parameter. The profile id is returned in the X-Profile-Id response header. Requests
+    without the flag are passed straight through.
+
+    This must be added inside QueryStatsMiddleware, which provides the SQL timeline. Code run in the threadpool (the
+    body of sync endpoints) is not sampled, and appears as time spent awaiting the threadpool, but its queries are
+    still included in the SQL timeline.
+
+    :param app: ASGI application
+    :param authorize: Coroutine function returning whether a request is allowed to be profiled
+    :param buffer: Buffer that captured profiles are stored in
+    """
+
+    def __init__(self, app: ASGIApp, authorize: Callable[[Request], Awaitable[bool]], buffer: ProfileBuffer):
+        self.app = app
+        self.authorize = authorize
+        self.buffer = buffer
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http' or not profiling_requested(scope) or not await self.authorize(Request(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        profile_id = uuid.uuid4().hex
+        status_code = 500
+        query_stats = current_query_stats.get()
+        if query_stats is not None:
+            query_stats.timeline = []
+
+        async def send_with_profile_id(message: Message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+                message['headers'] = [*message.get('headers', []), (b'x-profile-id', profile_id.encode())]
+            await send(message)
+
+        started_at = datetime.datetime.utcnow()
+        start = time.perf_counter()
+        profiler = Profiler(interval=PROFILE_SAMPLE_INTERVAL_SECONDS, async_mode='enabled')
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile_id)
+        finally:
+            session = profiler.stop()
+            self.buffer.add({
+                'id': profile_id,
+                'method': scope['method'],
+                'path': scope['path'],
+                'status': status_code,
+                'started_at': started_at.isoformat(),
+                'duration_ms': (time.perf_counter() - start) * 1000,
+                'queries': len(query_stats.timeline) if query_stats is not None else None,
+                'session': session,
+                'sql_timeline': query_stats.timeline if query_stats is not None else [],
+            })
+
+
+profile_buffer = ProfileBuffer()
@@ -0,0 +1,74 @@
+from typing import NamedTuple, Type
+
+from sqlalchemy import select, update, inspect, true
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+from src.utility.database import models
+from src.utility.responses import CredentialException
+
+# Rows of each model a participant owns, given their user id. Other roles may access every row.
+OWNER_PREDICATES = {
+    models.ProjectModel: lambda user_id: models.ProjectModel.id == select(models.UserModel.project_id)
+    .where(models.UserModel.id == user_id).scalar_subquery(),
+    models.MentorshipRequestModel: lambda user_id: models.MentorshipRequestModel.participant_user_id == user_id,
+}
+
+
+class OwnerScope(NamedTuple):
+    predicate: ColumnElement
+    not_found: Type[Exception]
+
+
+def owner_scope(model, current_user, not_found: Type[Exception]) -> OwnerScope:
+    """
+    Limit a query to the rows the current user may access, by adding the predicate to its WHERE clause, so that
+    checking access takes no query of its own. Participants may only access their own rows, and are refused with a
+    CredentialException whether the row belongs to someone else or does not exist.
+
+    :param model: Model being queried, which must be in OWNER_PREDICATES
+    :param current_user: Principal making the request
+    :param not_found: Exception raised for other roles when no row matches
+    :return: Predicate, and the exception to raise when the scoped query finds no row
+    """
+    if current_user.role == 'participant':
+        return OwnerScope(OWNER_PREDICATES[model](current_user.id), CredentialException)
+
+    return OwnerScope(true(), not_found)
+
+
+def returned_columns(model) -> list:
+    """
+    Columns to return from an INSERT or UPDATE ... RETURNING statement that is loaded as the model. Deferred columns,
+    such as ProjectModel.search_vector, are left out as they would be when selecting the model.
+    """
+    return [prop.columns[0] for prop in inspect(model).column_attrs if not prop.deferred]
+
+
+def update_by_id_db(db: Session, model, entity_id: int, values: dict, not_found: Type[Exception], options: tuple = (),
+                    where: ColumnElement = true()):
+    """
+    Update a row and load it back with a single UPDATE ... RETURNING statement, rather than selecting it to check that
+    it exists, updating it and then selecting it again.
+
+    Relationships in options are still loaded by their own queries. Committing expires the returned object, so convert
+    it to its response model before committing, or serializing it will select it again.
+
+    :param db: Database session
+    :param model: Model of the row, which must have an integer id primary key
+    :param entity_id: Id of the row to update
+    :param values: Column values to set
+    :param not_found: Exception raised if there is no row with the given id (and meeting where)
+    :param options: Loader options for the returned object, such as project_load_options
+    :param where: Further condition the row must meet to be updated, such as an owner_scope predicate
+    :return: Updated object
+    """
+    statement = update(model).where(model.id == entity_id, where).values(**values).returning(*returned_columns(model))
+    entity = db.execute(
+        select(model).from_statement(statement).options(*options).execution_options(populate_existing=True)
+    ).scalar_one_or_none()
+
+    if entity is None:
+        raise not_found
+
+    return entity
@@ -8,6 +8,10 @@ class PrizeNotFoundException(Exception):
     pass
 
 
+class PrizeNotSelectableException(Exception):
+    pass
+
+
 class ProjectNotFoundException(Exception):
     pass
 
@@ -22,3 +26,11 @@ class UserNotFoundException(Exception):
 
 class MentorshipRequestNotFoundException(Exception):
     pass
+
+
+class PasswordHashingBusyException(Exception):
+    pass
+
+
+class InvalidCursorException(Exception):
+    pass
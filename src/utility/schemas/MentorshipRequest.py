@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -17,8 +19,8 @@ class MentorshipRequest(MentorshipRequestBase):
     id: int
     resolved: bool = False
 
-    participant_user_id: int
-    mentor_user_id: int
+    participant_user_id: Optional[int]
+    mentor_user_id: Optional[int]  # None until a mentor picks up the request
 
     class Config:
         orm_mode = True
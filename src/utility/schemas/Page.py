@@ -0,0 +1,14 @@
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic.generics import GenericModel
+
+ItemType = TypeVar('ItemType')
+
+
+class Page(GenericModel, Generic[ItemType]):
+    """
+    One page of a listing. Pass next_cursor back as the cursor parameter to fetch the following page; it is None on
+    the last page.
+    """
+    items: List[ItemType]
+    next_cursor: Optional[str] = None
@@ -24,6 +24,14 @@ class ProjectCreate(ProjectBase):
     pass
 
 
+class ProjectSearchResult(BaseModel):
+    id: int
+    name: str
+    technologiesUsed: str
+    rank: float
+    snippet: str  # HTML, with matching words wrapped in <mark> tags
+
+
 class Project(ProjectBase):
     id: int
     prizes_attempted: "List[Prize]"
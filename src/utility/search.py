@@ -0,0 +1,63 @@
+import html
+
+from sqlalchemy import select, func, or_, and_, literal_column
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.utility.database import models
+from src.utility.pagination import RankedPageParams, encode_ranked_cursor
+
+# Must match the text search configuration of ProjectModel.search_vector. Written as a literal, since a bound parameter
+# would be sent as varchar, which the text search functions do not accept.
+SEARCH_CONFIG = literal_column("'english'::regconfig")
+MAX_SEARCH_QUERY_LENGTH = 200
+
+# ts_headline does not escape the text around the highlighted words, so they are marked with control characters that
+# are swapped for <mark> tags once the rest of the snippet has been escaped.
+HIGHLIGHT_START, HIGHLIGHT_STOP = '\x02', '\x03'
+SNIPPET_OPTIONS = f'StartSel={HIGHLIGHT_START}, StopSel={HIGHLIGHT_STOP}, MaxWords=25, MinWords=10, ' \
+                  f'MaxFragments=2, FragmentDelimiter=" ... "'
+
+
+def render_snippet(headline: str) -> str:
+    return html.escape(headline or '').replace(HIGHLIGHT_START, '<mark>').replace(HIGHLIGHT_STOP, '</mark>')
+
+
+async def search_projects_db(db: AsyncSession, text: str, page: RankedPageParams) -> dict:
+    """
+    Find projects matching a web search style query ("quoted phrases", OR, -excluded) in their name, technologies,
+    description, functionality or architecture, using the GIN index on ProjectModel.search_vector. Results are ordered
+    by relevance, and highlighted snippets are only generated for the projects on the requested page.
+
+    :param db: Database session
+    :param text: Search query entered by the user
+    :param page: Page size and position, from ranked_page_params
+    :return: Dictionary matching Page[ProjectSearchResult]
+    """
+    projects = models.ProjectModel
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, text)
+    rank = func.ts_rank(projects.search_vector, query)
+
+    matches = select(projects.id, rank.label('rank')).where(projects.search_vector.op('@@')(query))
+    if page.after_id is not None:
+        matches = matches.where(or_(rank < page.after_rank, and_(rank == page.after_rank, projects.id > page.after_id)))
+    matches = matches.order_by(rank.desc(), projects.id).limit(page.limit + 1).subquery()
+
+    document = func.concat_ws(' ', projects.technologiesUsed, projects.description, projects.functionality,
+                              projects.architecture)
+    statement = select(
+        projects.id,
+        projects.name,
+        projects.technologiesUsed,
+        matches.c.rank,
+        func.ts_headline(SEARCH_CONFIG, document, query, SNIPPET_OPTIONS).label('snippet'),
+    ).join(matches, matches.c.id == projects.id).order_by(matches.c.rank.desc(), projects.id)
+
+    rows = (await db.execute(statement)).all()
+
+    next_cursor = None
+    if len(rows) > page.limit:
+        rows = rows[:page.limit]
+        next_cursor = encode_ranked_cursor(rows[-1].rank, rows[-1].id)
+
+    items = [{**row._mapping, 'snippet': render_snippet(row.snippet)} for row in rows]
+    return {'items': items, 'next_cursor': next_cursor}
@@ -0,0 +1,73 @@
+import os
+import re
+from typing import Optional
+
+from pydantic import BaseSettings
+
+
+class Settings(BaseSettings):
+    """
+    Application configuration. Every field can be overridden with an environment variable of the same name, in upper
+    case (e.g. DB_POOL_SIZE=20).
+    """
+
+    # Database connection. DATABASE_URL takes precedence over the individual POSTGRES_* variables.
+    postgres_user: str = 'dashboard'
+    postgres_password: str = 'testpass'
+    postgres_server: str = 'postgres'
+    postgres_db: str = 'db'
+    database_url: Optional[str] = None
+
+    # Connection pool, per worker process. Each worker may open up to db_pool_size + db_max_overflow connections on
+    # each of the sync and async engines, which must fit within Postgres' max_connections.
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout: float = 30
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: int = 30000  # 0 disables the timeout
+    db_pool_stats_log_interval_seconds: int = 60  # 0 disables periodic logging
+
+    # Cross-worker cache invalidation over LISTEN/NOTIFY. Disable only when running a single worker.
+    cache_invalidation_listener: bool = True
+
+    # Authentication: role claims signed into access tokens, and the in-process principal and token version caches
+    token_role_claims: bool = True
+    principal_cache_size: int = 4096
+    principal_cache_ttl_seconds: int = 60
+    token_version_cache_size: int = 8192
+    token_version_cache_ttl_seconds: int = 30
+
+    # Password hashing
+    bcrypt_rounds: int = 12
+    password_hash_workers: int = os.cpu_count() or 1
+    password_hash_max_queue: int = 64
+    password_hash_use_processes: bool = False
+    password_import_workers: int = max(1, (os.cpu_count() or 1) // 2)
+
+    log_level: str = 'INFO'
+
+    # Development mode enables extra diagnostics, such as warning about statements repeated more than
+    # n_plus_one_threshold times in one request. Do not enable it in production.
+    dev_mode: bool = False
+    n_plus_one_threshold: int = 5
+
+    @property
+    def sqlalchemy_database_url(self) -> str:
+        if self.database_url:
+            return self.database_url
+        return f"postgresql://{self.postgres_user}:{self.postgres_password}@{self.postgres_server}/{self.postgres_db}"
+
+    @property
+    def postgres_dsn(self) -> str:
+        """
+        Connection string without a SQLAlchemy driver name, for connecting with asyncpg directly.
+        """
+        return re.sub(r'^postgresql\+\w+://', 'postgresql://', self.sqlalchemy_database_url)
+
+    @property
+    def async_sqlalchemy_database_url(self) -> str:
+        return re.sub(r'^postgresql(\+\w+)?://', 'postgresql+asyncpg://', self.sqlalchemy_database_url)
+
+
+settings = Settings()
@@ -1,7 +1,16 @@
 #!/bin/bash
+set -e
 
-# Run migrations
-alembic upgrade head
+# Run migrations, once per container. Replicas starting together are serialized by a lock in alembic/env.py. Set
+# RUN_MIGRATIONS=false when migrations are run separately, such as by a one-off release job.
+if [ "${RUN_MIGRATIONS:-true}" = "true" ]; then
+    alembic upgrade head
+fi
 
 # Start Server
-uvicorn src.main:app --host 0.0.0.0 --port 5001 --debug --reload-dir /app --log-level debug
\ No newline at end of file
+if [ "${DEV_MODE:-false}" = "true" ]; then
+    # Single process with auto-reload and debug logging, for local development
+    exec uvicorn src.main:app --host 0.0.0.0 --port 5001 --debug --reload-dir /app --log-level debug
+else
+    exec gunicorn src.main:app -c gunicorn_conf.py
+fi